@@ -0,0 +1,61 @@
+"""
+Time interpreter startup with modpipe, and worker-side pipeline rebuilds.
+
+    python benchmarks/bench_import.py
+
+Reports the median wall time of fresh interpreters running ``pass``,
+``import modpipe`` and ``from modpipe import ModPipe``, then compares
+building a 200-stage pipeline from scratch against rebuilding it from a
+manifest (as process-pool and Spark workers do).
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from modpipe import ModPipe  # noqa: E402
+from generate import ModuleFactory, generate_module  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATEMENTS = [
+    'pass',
+    'import modpipe',
+    'from modpipe import ModPipe',
+]
+
+
+def time_interpreter(statement: str, runs: int = 15) -> float:
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', statement], cwd=ROOT)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def main():
+    for statement in STATEMENTS:
+        t = time_interpreter(statement)
+        print("{:<32} {:>8.1f} ms".format(statement, t * 1e3))
+
+    with ModuleFactory() as factory:
+        name = factory.write('bench_manifest',
+                             generate_module(200, instance_every=4))
+        manifest = ModPipe(name).manifest()
+
+        full = min(timeit.repeat(lambda: ModPipe(name), number=1, repeat=5))
+        fast = min(timeit.repeat(lambda: ModPipe.from_manifest(manifest),
+                                 number=1, repeat=5))
+    print("{:<32} {:>8.1f} ms".format('ModPipe(...) [200 stages]', full * 1e3))
+    print("{:<32} {:>8.1f} ms".format('ModPipe.from_manifest(...)',
+                                      fast * 1e3))
+
+
+if __name__ == '__main__':
+    main()
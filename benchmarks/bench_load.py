@@ -0,0 +1,34 @@
+"""
+Time pipeline loading against the number of stages.
+
+    python benchmarks/bench_load.py 100 1000 4000
+
+Each generated module alternates plain functions with callable-instance
+stages (the slow path for source resolution). Per-stage load time should
+stay roughly flat as the stage count grows.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from modpipe import ModPipe  # noqa: E402
+from generate import ModuleFactory, generate_module  # noqa: E402
+
+
+def main(counts):
+    print("{:>8} {:>12} {:>14}".format("stages", "load (s)", "per stage (us)"))
+    with ModuleFactory() as factory:
+        for n in counts:
+            name = factory.write("bench_load_{}".format(n),
+                                 generate_module(n, instance_every=4))
+
+            ModPipe(name)  # Warm the import system and bytecode cache.
+            t = min(timeit.repeat(lambda: ModPipe(name), number=1, repeat=3))
+            print("{:>8} {:>12.4f} {:>14.2f}".format(n, t, t / n * 1e6))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 4000])
@@ -0,0 +1,90 @@
+"""
+Generate synthetic pipeline modules for benchmarking.
+"""
+import os
+import sys
+import tempfile
+
+TEMPLATE_HEADER = """from modpipe import Done, SkipTo
+
+
+class Shift:
+    def __init__(self, k):
+        self.k = k
+
+    def __call__(self, {params}):
+        return {shifted}
+
+"""
+
+
+def generate_module(stages: int, arity: int = 1, done_pct: int = 0,
+                    skip_pct: int = 0, instance_every: int = 0) -> str:
+    """
+    :param stages: The number of pipeline stages.
+    :param arity: 1 for scalar stages; 2 for stages (after the first, which
+        always takes the integer item) taking and returning a pair, so every
+        call star-expands a tuple.
+    :param done_pct: The percent of (integer) items the first stage ends
+        with Done.
+    :param skip_pct: The percent of items the first stage sends, via
+        SkipTo, past the first half of the pipeline.
+    :param instance_every: If non-zero, every nth stage is a callable
+        instance rather than a function.
+    :return: the module source.
+    """
+    params = "x" if arity == 1 else "x, y"
+    shifted = "x + {k}" if arity == 1 else "x + {k}, y"
+    mid = max(stages // 2, 1)
+
+    lines = [TEMPLATE_HEADER.format(params=params,
+                                    shifted=shifted.format(k="self.k"))]
+
+    out = "x" if arity == 1 else "x, x"
+    first = ["def stage_0(x):"]
+    if done_pct:
+        first.append("    if x % 100 < {}:".format(done_pct))
+        first.append("        return Done({})".format(out))
+    if skip_pct and stages > 1:
+        first.append("    if x % 100 >= {}:".format(100 - skip_pct))
+        first.append("        return SkipTo(stage_{}, {})".format(mid, out))
+    first.append("    return {}\n".format(out))
+    lines.append("\n".join(first))
+
+    for i in range(1, stages):
+        if instance_every and i % instance_every == 0:
+            lines.append("stage_{} = Shift({})\n".format(i, i))
+        else:
+            lines.append("def stage_{}({}):\n    return {}\n".format(
+                i, params, shifted.format(k=i)))
+
+    return "\n\n".join(lines)
+
+
+class ModuleFactory:
+    """
+    Writes generated modules into a temporary directory on sys.path. Use it
+    as a context manager to remove the directory afterwards.
+    """
+
+    def __init__(self):
+        self._tmp = tempfile.TemporaryDirectory(prefix='modpipe_bench_')
+        self.dir = self._tmp.name
+        sys.path.insert(0, self.dir)
+
+    def write(self, name: str, source: str) -> str:
+        with open(os.path.join(self.dir, name + '.py'), 'w') as fp:
+            fp.write(source)
+        return name
+
+    def close(self):
+        if self.dir in sys.path:
+            sys.path.remove(self.dir)
+        self._tmp.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+        return False
@@ -0,0 +1,109 @@
+"""
+Benchmark pipeline load, reload and per-item throughput.
+
+    python benchmarks/run.py                          # print results
+    python benchmarks/run.py --save benchmarks/baseline.json
+    python benchmarks/run.py --compare benchmarks/baseline.json
+
+--compare exits non-zero if any metric is slower than the baseline by more
+than --threshold (default 1.25x). Baselines are machine specific, so they
+aren't committed; save one on the machine you compare on (e.g. with
+``make bench-baseline`` on master).
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from modpipe import ModPipe  # noqa: E402
+from generate import ModuleFactory, generate_module  # noqa: E402
+
+CASES = OrderedDict([
+    ('scalar_10', dict(stages=10)),
+    ('scalar_100', dict(stages=100)),
+    ('scalar_1000', dict(stages=1000)),
+    ('pair_10', dict(stages=10, arity=2)),
+    ('instances_100', dict(stages=100, instance_every=2)),
+    ('done_50pct_10', dict(stages=10, done_pct=50)),
+    ('skip_50pct_10', dict(stages=10, skip_pct=50)),
+    ('mixed_30', dict(stages=30, arity=2, done_pct=10, skip_pct=20,
+                      instance_every=5)),
+])
+
+N_ITEMS = 20000
+
+
+def best_of(f, repeat=5, number=1) -> float:
+    return min(timeit.repeat(f, number=number, repeat=repeat)) / number
+
+
+def bench_case(factory: ModuleFactory, name: str, params: dict):
+    module_name = factory.write('bench_' + name, generate_module(**params))
+    pipe = ModPipe(module_name)
+    n_items = N_ITEMS if params['stages'] <= 100 else N_ITEMS // 10
+    items = list(range(n_items))
+
+    def call_each():
+        return [pipe(item) for item in items]
+
+    return OrderedDict([
+        ('load_s', best_of(lambda: ModPipe(module_name), repeat=3)),
+        ('reload_s', best_of(lambda: pipe.reload(force=True), repeat=3)),
+        ('reload_unchanged_s', best_of(pipe.reload, number=100)),
+        ('call_per_item_s', best_of(call_each) / n_items),
+        ('map_per_item_s', best_of(lambda: pipe.map(items)) / n_items),
+    ])
+
+
+def compare(results, baseline, threshold: float) -> bool:
+    ok = True
+    print("{:<16} {:<20} {:>10}".format("case", "metric", "ratio"))
+    for case, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(case, {}).get(metric)
+            if not base:
+                continue
+            ratio = value / base
+            flag = " REGRESSION" if ratio > threshold else ""
+            ok = ok and not flag
+            print("{:<16} {:<20} {:>9.2f}x{}".format(case, metric, ratio,
+                                                     flag))
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--save', help="write results to this JSON file")
+    parser.add_argument('--compare', help="compare against a saved JSON file")
+    parser.add_argument('--threshold', type=float, default=1.25)
+    parser.add_argument('cases', nargs='*', help="subset of cases to run")
+    args = parser.parse_args(argv)
+
+    results = OrderedDict()
+    with ModuleFactory() as factory:
+        for name, params in CASES.items():
+            if args.cases and name not in args.cases:
+                continue
+            results[name] = bench_case(factory, name, params)
+            print(name, json.dumps(results[name]))
+
+    if args.save:
+        with open(args.save, 'w') as fp:
+            json.dump(results, fp, indent=2)
+
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+        if not compare(results, baseline, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,40 @@
-from modpipe.modpipe_impl import ModPipe  # noqa: F401
-from modpipe.results import Result, Done, SkipTo  # noqa: F401
+import sys
+
+from modpipe.results import Result, Done, SkipTo, Drop  # noqa: F401
 
 __author__ = 'John Bjorn Nelson'
 __email__ = 'jbn@abreka.com'
 __version__ = '0.0.4'
+
+# Everything but the result types is imported on first access, so pipeline
+# modules (which usually only need Done/SkipTo) and short-lived worker
+# processes don't pay for inspect, multiprocessing, sqlite3, etc.
+_LAZY_ATTRS = {
+    'ModPipe': 'modpipe.modpipe_impl',
+    'memoize': 'modpipe.memo',
+    'batch': 'modpipe.batching',
+    'fan_out': 'modpipe.fanout',
+    'Checkpoints': 'modpipe.checkpoint',
+    'DeadLetters': 'modpipe.deadletter',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        msg = "module {!r} has no attribute {!r}".format(__name__, name)
+        raise AttributeError(msg)
+
+    from importlib import import_module
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
+
+if sys.version_info < (3, 7):  # No module __getattr__ (PEP 562).
+    for _name in _LAZY_ATTRS:
+        __getattr__(_name)
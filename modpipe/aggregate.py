@@ -0,0 +1,300 @@
+"""
+Streaming keyed aggregation with bounded memory.
+
+Outputs are folded into per-key accumulators as they arrive. When there are
+too many keys to hold, the accumulators are spilled to a run file sorted by
+key, and the runs are merged when the results are read.
+"""
+import heapq
+import os
+import pickle
+import tempfile
+from operator import itemgetter
+from typing import Callable, Iterable, Iterator, Mapping, Sequence, Tuple
+
+
+class Agg:
+    """
+    How to aggregate the values of one key. Subclasses define zero, add and
+    merge; finish optionally converts the accumulator to the result.
+    """
+
+    def zero(self):
+        """
+        :return: an empty accumulator.
+        """
+        raise NotImplementedError
+
+    def add(self, acc, value):
+        """
+        :return: the accumulator with value folded in (which may be acc,
+            updated in place).
+        """
+        raise NotImplementedError
+
+    def merge(self, a, b):
+        """
+        :return: the combination of two partial accumulators.
+        """
+        raise NotImplementedError
+
+    def finish(self, acc):
+        return acc
+
+
+class Count(Agg):
+
+    def zero(self):
+        return 0
+
+    def add(self, acc, value):
+        return acc + 1
+
+    def merge(self, a, b):
+        return a + b
+
+
+class Sum(Agg):
+
+    def zero(self):
+        return 0
+
+    def add(self, acc, value):
+        return acc + value
+
+    def merge(self, a, b):
+        return a + b
+
+
+class Min(Agg):
+
+    def zero(self):
+        return None
+
+    def add(self, acc, value):
+        return value if acc is None or value < acc else acc
+
+    def merge(self, a, b):
+        return a if b is None else self.add(a, b)
+
+
+class Max(Agg):
+
+    def zero(self):
+        return None
+
+    def add(self, acc, value):
+        return value if acc is None or value > acc else acc
+
+    def merge(self, a, b):
+        return a if b is None else self.add(a, b)
+
+
+class Distinct(Agg):
+
+    def zero(self):
+        return set()
+
+    def add(self, acc, value):
+        acc.add(value)
+        return acc
+
+    def merge(self, a, b):
+        a |= b
+        return a
+
+
+def _identity(x):
+    return x
+
+
+def _read_run(path: str) -> Iterator[Tuple]:
+    with open(path, 'rb') as fp:
+        while True:
+            try:
+                yield pickle.load(fp)
+            except EOFError:
+                return
+
+
+class Aggregate:
+    """
+    A sink that folds records into per-key accumulators.
+
+    At most max_keys accumulators are held in memory; beyond that, they're
+    spilled to a temporary file sorted by key, so keys must be orderable.
+    Reading the results merges the spilled runs back together, at most
+    max_open_runs files at a time: if there are more, batches of them are
+    first merged into intermediate runs.
+
+    It has the write_many method of the writers in modpipe.streams, so it
+    can be the sink of ModPipe.run.
+    """
+
+    def __init__(self, key: Callable, agg: Agg, value: Callable = None,
+                 max_keys: int = 1000000, spill_dir: str = None,
+                 max_open_runs: int = 64):
+        """
+        :param key: Maps a record to its key.
+        :param agg: The Agg for each key's values.
+        :param value: Maps a record to the value aggregated (by default, the
+            record itself).
+        :param max_keys: The number of keys held in memory before spilling.
+        :param spill_dir: Where to write run files (by default, the system
+            temporary directory).
+        :param max_open_runs: The number of run files merged at once.
+        """
+        if max_open_runs < 2:
+            raise ValueError("Need to merge at least two runs at once")
+
+        self.key = key
+        self.agg = agg
+        self.value = value or _identity
+        self.max_keys = max_keys
+        self.spill_dir = spill_dir
+        self.max_open_runs = max_open_runs
+
+        self._table = {}
+        self._runs = []
+
+    @property
+    def spills(self) -> int:
+        return len(self._runs)
+
+    def add(self, record):
+        """
+        :param record: A record to fold in.
+        """
+        self.write_many((record,))
+
+    def write_many(self, records: Iterable):
+        """
+        :param records: Records to fold in.
+        """
+        table, agg, key, value = self._table, self.agg, self.key, self.value
+        zero, add = agg.zero, agg.add
+
+        for record in records:
+            k = key(record)
+            acc = table[k] if k in table else zero()
+            table[k] = add(acc, value(record))
+            if len(table) > self.max_keys:
+                self._spill()
+
+    def merge_state(self, state: Mapping):
+        """
+        Merge in partial accumulators, e.g. from another process.
+
+        :param state: A map from key to accumulator.
+        """
+        table, merge = self._table, self.agg.merge
+
+        for k, acc in state.items():
+            table[k] = merge(table[k], acc) if k in table else acc
+            if len(table) > self.max_keys:
+                self._spill()
+
+    def merge(self, other: 'Aggregate'):
+        """
+        Merge another aggregate (with the same Agg) into this one.
+
+        :param other: The other aggregate. Its spilled runs are read back.
+        """
+        self.merge_state(dict(other.iter_state()))
+
+    def _write_run(self, pairs: Iterable[Tuple]):
+        fd, path = tempfile.mkstemp(prefix='modpipe-agg-', suffix='.run',
+                                    dir=self.spill_dir)
+        self._runs.append(path)
+        with os.fdopen(fd, 'wb') as fp:
+            for pair in pairs:
+                pickle.dump(pair, fp, 4)
+
+    def _spill(self):
+        self._write_run(sorted(self._table.items(), key=itemgetter(0)))
+        self._table.clear()
+
+    def _compact(self):
+        # Merge the oldest runs into one until the rest can be open at once.
+        while len(self._runs) > self.max_open_runs:
+            batch = self._runs[:self.max_open_runs]
+            self._write_run(self._merged([_read_run(p) for p in batch]))
+            del self._runs[:len(batch)]
+            for path in batch:
+                os.remove(path)
+
+    def iter_state(self) -> Iterator[Tuple]:
+        """
+        :return: a generator of (key, accumulator) pairs in key order, with
+            each key's spilled partial accumulators merged.
+        """
+        self._compact()
+        runs = [_read_run(path) for path in self._runs]
+        runs.append(iter(sorted(self._table.items(), key=itemgetter(0))))
+        yield from self._merged(runs)
+
+    def _merged(self, runs: Sequence[Iterator[Tuple]]) -> Iterator[Tuple]:
+        # The sorted runs merged, combining each key's accumulators.
+        merge = self.agg.merge
+
+        current = None
+        for k, acc in heapq.merge(*runs, key=itemgetter(0)):
+            if current is not None and current[0] == k:
+                current = (k, merge(current[1], acc))
+                continue
+            if current is not None:
+                yield current
+            current = (k, acc)
+
+        if current is not None:
+            yield current
+
+    def items(self) -> Iterator[Tuple]:
+        """
+        :return: a generator of (key, result) pairs in key order.
+        """
+        finish = self.agg.finish
+        for k, acc in self.iter_state():
+            yield k, finish(acc)
+
+    def result(self) -> dict:
+        """
+        :return: a dict from key to result. This holds every key in memory.
+        """
+        return dict(self.items())
+
+    def close(self):
+        """
+        Delete any run files.
+        """
+        for path in self._runs:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._runs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        if self._runs:
+            self.close()
+
+
+def fold_partial(records: Sequence, key: Callable, agg: Agg,
+                 value: Callable = None) -> dict:
+    """
+    :param records: Records to fold.
+    :param key: Maps a record to its key.
+    :param agg: The Agg.
+    :param value: Maps a record to its value.
+    :return: a map from key to the records' partial accumulator.
+    """
+    partial = Aggregate(key, agg, value, max_keys=float('inf'))
+    partial.write_many(records)
+    return partial._table
@@ -0,0 +1,99 @@
+"""
+asyncio support for pipelines with ``async def`` stages.
+
+This lives apart from the rest of the package (and is only imported on
+demand) because it uses async generators, which need Python 3.6+.
+"""
+import asyncio
+from collections import deque
+
+from modpipe.plan import Plan
+from modpipe.results import Result, Done, SkipTo, Drop
+
+
+async def arun(plan: Plan, args: tuple):
+    """
+    Run one item through the plan, awaiting coroutine stages.
+
+    Synchronous stages run inline, exactly as in Plan.run, and batch stages
+    run on batches of one.
+
+    :param plan: The compiled plan.
+    :param args: The positional arguments for the first stage.
+    :return: the final value, as ModPipe.__call__ returns it.
+    """
+    if plan.is_fan_out:
+        raise RuntimeError("Pipeline has fan-out stages; use imap")
+
+    steps, awaits, n, i = plan.steps, plan.awaits, len(plan.steps), 0
+    batched = plan.batched
+
+    while i < n:
+        f, arity = steps[i]
+        is_async = awaits[i]
+        i += 1
+
+        if batched[i - 1] is not None:
+            res = plan._call_batch(i - 1, [args])[0]
+        elif isinstance(args, tuple) and len(args) == arity:
+            res = f(*args)
+        else:
+            res = f(args)
+
+        if is_async:
+            res = await res
+
+        if res is None:
+            continue
+        elif not isinstance(res, Result):
+            args = res
+            continue
+
+        args = res.args
+        if isinstance(res, Done):
+            if res is Drop:
+                plan.drops[i - 1] += 1
+            break
+        elif isinstance(res, SkipTo):
+            i = plan.jump(res.target_f, i)
+
+    return args
+
+
+async def _aiter(iterable):
+    if hasattr(iterable, '__aiter__'):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
+
+
+async def amap(plan: Plan, iterable, concurrency: int = 64):
+    """
+    Run items through the plan with up to ``concurrency`` of them
+    interleaved across await points.
+
+    :param plan: The compiled plan.
+    :param iterable: The items to process, as an async or plain iterable.
+    :param concurrency: The bound on in-flight items.
+    :return: an async generator over the results, in input order, less
+        those of dropped items.
+    """
+    pending = deque()
+
+    try:
+        async for item in _aiter(iterable):
+            if len(pending) >= concurrency:
+                res = await pending.popleft()
+                if res is not Drop:
+                    yield res
+            pending.append(asyncio.ensure_future(arun(plan, (item,))))
+
+        while pending:
+            res = await pending.popleft()
+            if res is not Drop:
+                yield res
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,37 @@
+from modpipe.callables import is_async_callable
+
+BATCH_ATTR = '__modpipe_batch__'
+
+
+def batch(f=None, array: bool = False):
+    """
+    Mark a stage as batch-aware.
+
+    In bulk modes, a batch stage is called once per group of items with a
+    list of their inputs, and must return a sequence of per-item results of
+    the same length. Each result means what it would for a normal stage:
+    None passes the input through, and a Done or SkipTo applies to just
+    that item. Each input is what a one-argument stage would receive.
+
+    Usable bare (``@batch``) or with options (``@batch(array=True)``).
+
+    :param f: The stage to mark.
+    :param array: if True, pass the inputs as a NumPy array rather than a
+        list. Requires NumPy.
+    :return: the marked stage, or a decorator if f isn't given.
+    """
+    def mark(f):
+        if is_async_callable(f):
+            raise TypeError("Can't batch async stage {}".format(f))
+        setattr(f, BATCH_ATTR, (array,))
+        return f
+
+    return mark if f is None else mark(f)
+
+
+def batch_options(f):
+    """
+    :param f: A pipeline callable.
+    :return: the options it was marked batch-aware with, or None.
+    """
+    return getattr(f, BATCH_ATTR, None)
@@ -0,0 +1,60 @@
+"""
+Cheap predicates and fingerprints for pipeline callables.
+
+Unlike modpipe.helpers, nothing here touches source code, so it's safe to
+use on the worker fast path without importing inspect.
+"""
+import hashlib
+from types import CodeType
+
+CO_COROUTINE = 0x0080  # As in inspect; for async def functions.
+
+
+def is_async_callable(obj) -> bool:
+    """
+    :param obj: Any callable
+    :return: true if calling the object returns a coroutine, i.e. it's an
+        ``async def`` function or an instance with an ``async def __call__``.
+    """
+    for f in (obj, getattr(type(obj), '__call__', None)):
+        code = getattr(f, '__code__', None)
+        if code is not None and code.co_flags & CO_COROUTINE:
+            return True
+    return False
+
+
+def _const_key(c):
+    if isinstance(c, CodeType):
+        return _code_key(c)
+    elif isinstance(c, frozenset):  # Set literals; repr order isn't stable.
+        return sorted(repr(x) for x in c)
+    return repr(c)
+
+
+def _code_key(code) -> tuple:
+    consts = tuple(_const_key(c) for c in code.co_consts)
+    return code.co_code, consts, code.co_names, code.co_varnames
+
+
+def fingerprint_callable(obj) -> str:
+    """
+    Hash what a callable does, independent of where it sits in its file.
+
+    Functions hash their bytecode, constants, names and defaults. Callable
+    instances hash their class's ``__call__`` plus their attributes' reprs.
+    Changes to globals a callable reads aren't detected.
+
+    :param obj: Any callable
+    :return: a hex digest that changes when the callable's code does.
+    """
+    code = getattr(obj, '__code__', None)
+    if code is not None:
+        key = (_code_key(code), repr(obj.__defaults__))
+    else:
+        call = getattr(type(obj), '__call__', None)
+        call_code = getattr(call, '__code__', None)
+        key = (_code_key(call_code) if call_code else repr(call),
+               repr(sorted(vars(obj).items())) if hasattr(obj, '__dict__')
+               else '')
+
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
@@ -0,0 +1,146 @@
+from collections import Counter, OrderedDict
+from threading import RLock
+from typing import Sequence
+
+from modpipe.modpipe_impl import ModPipe
+from modpipe.plan import Plan
+
+
+def concat_plans(module_names: Sequence[str],
+                 plans: Sequence[Plan]) -> Plan:
+    """
+    Flatten several plans into one, in order.
+
+    Bindings that occur in more than one plan are qualified with their
+    module's name (e.g. ``clean_pipeline.load``), so every stage keeps a
+    unique binding. SkipTo a function works across plans either way.
+
+    :param module_names: The module name of each plan.
+    :param plans: The plans.
+    :return: the concatenated plan.
+    """
+    counts = Counter(k for plan in plans for k in plan.names)
+
+    pipeline, arities, signatures, skip_targets = OrderedDict(), {}, {}, {}
+    for module_name, plan in zip(module_names, plans):
+        for k, f in plan.pipeline.items():
+            key = k if counts[k] == 1 else '{}.{}'.format(module_name, k)
+            pipeline[key] = f
+            if k in plan.skip_targets:
+                skip_targets[key] = plan.skip_targets[k]
+        arities.update(plan.expected_args)
+        signatures.update(plan._signatures or {})
+
+    if len(signatures) < len(arities):
+        signatures = None
+
+    return Plan(pipeline, signatures, skip_targets, arities)
+
+
+class Chain(ModPipe):
+    """
+    Several pipeline modules run as one flattened pipeline, as if their
+    stages were defined in a single module, one after the other.
+
+    A Done in any module ends the whole chain, and a SkipTo may target a
+    stage in a later module. Each component reloads independently.
+    """
+
+    def __init__(self, components: Sequence[ModPipe]):
+        """
+        :param components: The pipelines to chain, in order.
+        """
+        flat = []
+        for c in components:
+            flat.extend(c._components if isinstance(c, Chain) else [c])
+        if not flat:
+            raise ValueError("Nothing to chain")
+
+        self._components = tuple(flat)
+        self._component_plans = None
+        self._lock = RLock()
+        self._stage_stats = None
+        self._tracer = None
+        self._caches = {}
+        self._stages_deleted = False
+
+        self.reload()
+
+    @property
+    def components(self):
+        return self._components
+
+    @property
+    def module_name(self):
+        return tuple(c.module_name for c in self._components)
+
+    @property
+    def abs_module_path(self):
+        return tuple(c.abs_module_path for c in self._components)
+
+    def reload(self, force=False, validate=False):
+        """
+        Reload each component (see ModPipe.reload), then re-flatten the
+        pipeline if any of them changed or stages were deleted.
+
+        :param force: if True, reload even if nothing changed.
+        :param validate: if True, validate each component before swapping
+            it in. If one fails, the chain keeps running its old pipeline.
+        """
+        with self._lock:
+            for c in self._components:
+                c.reload(force, validate)
+
+            plans = tuple(c._plan for c in self._components)
+            unchanged = self._component_plans is not None and \
+                all(a is b for a, b in zip(plans, self._component_plans))
+            if unchanged and not (force or self._stages_deleted):
+                return
+
+            self._component_plans = plans
+            self._stages_deleted = False
+            names = [c.module_name for c in self._components]
+            self._install(concat_plans(names, [p.bare() for p in plans]))
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        # The components ship their own plans; these are only for
+        # spotting changes on reload.
+        del state['_component_plans']
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._component_plans = tuple(c._plan for c in self._components)
+
+    def _source_paths(self) -> list:
+        return [path for c in self._components for path in c._source_paths()]
+
+    def manifest(self) -> dict:
+        """
+        :return: the manifest of each component, plus the chain's stages.
+        """
+        return {
+            'chain': [c.manifest() for c in self._components],
+            'stages': [[name, arity] for name, (_, arity)
+                       in zip(self._plan.names, self._plan.steps)],
+        }
+
+    @classmethod
+    def from_manifest(cls, manifest: dict) -> 'Chain':
+        """
+        Rebuild a chain from Chain.manifest.
+
+        :param manifest: The manifest.
+        :return: an instantiated Chain.
+        """
+        chain = cls([ModPipe.from_manifest(m) for m in manifest['chain']])
+        names = {name for name, _ in manifest['stages']}
+        for k in list(chain._pipeline):
+            if k not in names:
+                del chain[k]
+        return chain
+
+    def __repr__(self):
+        return "ModPipe.chain({})".format(
+            ', '.join(c.module_name for c in self._components))
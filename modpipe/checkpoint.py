@@ -0,0 +1,189 @@
+import hashlib
+import pickle
+import sqlite3
+from typing import Callable, Iterable, Iterator, List, Sequence
+
+from modpipe.deadletter import DeadLetter
+from modpipe.plan import Plan, StageError
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    stage_fp TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    resume TEXT NOT NULL,
+    state BLOB NOT NULL,
+    PRIMARY KEY (item_key, stage_fp)
+)
+"""
+
+
+# How to continue after a checkpointed stage. Neither is a valid binding,
+# so anything else names a SkipTo target.
+_RESUME_NEXT = '+'
+_RESUME_DONE = '.'
+
+
+def default_item_key(item) -> str:
+    """
+    :param item: An input item.
+    :return: a hex digest of the pickled item.
+    """
+    return hashlib.sha1(pickle.dumps(item, 4)).hexdigest()
+
+
+def cumulative_fingerprints(plan: Plan) -> List[str]:
+    """
+    :param plan: A compiled plan.
+    :return: for each stage, a digest of the names and code of that stage
+        and every stage before it. Editing a stage changes its digest and
+        all downstream ones, but none upstream.
+    """
+    fps, h = [], hashlib.sha1()
+    for name, code_hash in plan.fingerprints:
+        h.update("{}:{};".format(name, code_hash).encode('utf-8'))
+        fps.append(h.hexdigest())
+    return fps
+
+
+class Checkpoints:
+    """
+    A sqlite store of per-stage, per-item pipeline state.
+
+    Each row is keyed by an item and the cumulative fingerprint of the
+    stages that produced it, so after an edit to stage k, a re-run resumes
+    every item from its deepest checkpoint before k.
+    """
+
+    def __init__(self, path: str, stages: Sequence[str] = None,
+                 key: Callable = default_item_key, commit_every: int = 1000):
+        """
+        :param path: The sqlite database file (or ':memory:').
+        :param stages: The bindings of the stages to checkpoint after
+            (defaults to all of them).
+        :param key: Maps an input item to a stable string key.
+        :param commit_every: The number of items between commits.
+        """
+        self.path = path
+        self.stages = None if stages is None else set(stages)
+        self.key = key
+        self.commit_every = commit_every
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+        return False
+
+    def _resume_point(self, plan: Plan, item_key: str, depth_of: dict):
+        rows = self._conn.execute(
+            "SELECT stage_fp, resume, state FROM checkpoints "
+            "WHERE item_key = ?", (item_key,))
+
+        best = None
+        for stage_fp, resume, state in rows:
+            depth = depth_of.get(stage_fp)
+            if depth is None or (best is not None and depth <= best[0]):
+                continue
+
+            if resume == _RESUME_NEXT:
+                i = depth + 1
+            elif resume == _RESUME_DONE:
+                i = len(plan)
+            elif resume in plan.jumps:
+                i = plan.jumps[resume]
+            else:
+                continue  # The SkipTo target is gone.
+
+            best = depth, i, state
+
+        return best
+
+    def run(self, plan: Plan, iterable: Iterable,
+            keep_going: bool = False) -> Iterator:
+        """
+        Run items through a plan, resuming each from its deepest valid
+        checkpoint and recording new ones.
+
+        :param plan: The compiled plan.
+        :param iterable: The items to process.
+        :param keep_going: if True, an item whose stage raises is yielded
+            as a DeadLetter (keeping the checkpoints made before the
+            failure) rather than aborting the run.
+        :return: a generator over the results, in input order.
+        """
+        if plan.is_async:
+            raise RuntimeError("Can't checkpoint a pipeline with async stages")
+        elif plan.is_fan_out:
+            raise RuntimeError("Can't checkpoint a pipeline with fan-out "
+                               "stages")
+
+        fps = cumulative_fingerprints(plan)
+        depth_of = {fp: i for i, fp in enumerate(fps)}
+        names = plan.names
+        save = [self.stages is None or name in self.stages for name in names]
+        n, insert = len(plan), self._conn.execute
+        sql = ("INSERT OR REPLACE INTO checkpoints "
+               "(stage_fp, item_key, resume, state) VALUES (?, ?, ?, ?)")
+
+        try:
+            for count, item in enumerate(iterable, 1):
+                item_key = self.key(item)
+                args, i = (item,), 0
+
+                best = self._resume_point(plan, item_key, depth_of)
+                if best is not None:
+                    _, i, state = best
+                    args = pickle.loads(state)
+
+                while i < n:
+                    last = i
+                    try:
+                        args, i = plan.advance(args, i)
+                    except Exception as e:
+                        if not keep_going:
+                            raise
+                        args = DeadLetter.from_stage_error(
+                            item, StageError(names[last], e))
+                        break
+
+                    if save[last]:
+                        if i is None:
+                            resume = _RESUME_DONE
+                        elif i == last + 1:
+                            resume = _RESUME_NEXT
+                        else:
+                            resume = names[i]
+                        insert(sql, (fps[last], item_key, resume,
+                                     pickle.dumps(args, 4)))
+
+                    if i is None:
+                        break
+
+                if count % self.commit_every == 0:
+                    self._conn.commit()
+
+                yield args
+        finally:
+            self._conn.commit()
+
+    def prune(self, plan: Plan) -> int:
+        """
+        Delete checkpoints that no longer match any stage of the plan.
+
+        :param plan: The current plan.
+        :return: the number of rows deleted.
+        """
+        fps = cumulative_fingerprints(plan)
+        marks = ",".join("?" * len(fps))
+        cur = self._conn.execute(
+            "DELETE FROM checkpoints WHERE stage_fp NOT IN ({})".format(marks),
+            fps)
+        self._conn.commit()
+        return cur.rowcount
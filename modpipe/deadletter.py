@@ -0,0 +1,235 @@
+"""
+Dead-letter routing for bulk runs.
+
+Rather than letting one bad record abort a run, items whose stages raise
+are set aside in a DeadLetters sink and the run carries on, up to an error
+budget.
+"""
+import json
+import pickle
+import traceback
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+from modpipe.plan import Plan, StageError
+
+
+class ErrorBudgetExceeded(RuntimeError):
+    """
+    Raised when a bulk run fails on more items than its DeadLetters allow.
+    """
+
+
+class DeadLetter:
+    """
+    A failed item: the original item, the stage that raised, the exception
+    and its formatted traceback.
+    """
+
+    __slots__ = ('item', 'stage', 'error', 'traceback')
+
+    def __init__(self, item, stage: str, error: BaseException,
+                 traceback: str):
+        self.item = item
+        self.stage = stage
+        self.error = error
+        self.traceback = traceback
+
+    @classmethod
+    def from_stage_error(cls, item, e: StageError) -> 'DeadLetter':
+        tb = ''.join(traceback.format_exception(type(e.error), e.error,
+                                                e.error.__traceback__))
+        return cls(item, e.stage, e.error, tb)
+
+    def picklable(self) -> 'DeadLetter':
+        """
+        :return: this letter, with the exception replaced by a RuntimeError
+            of its repr if it can't be pickled (e.g. to leave a worker).
+        """
+        try:
+            pickle.dumps(self.error)
+            return self
+        except Exception:
+            return DeadLetter(self.item, self.stage,
+                              RuntimeError(repr(self.error)), self.traceback)
+
+    def to_json(self) -> str:
+        """
+        :return: the letter as a line of JSON. Items that aren't JSON
+            serializable are written as their repr.
+        """
+        return json.dumps({
+            'stage': self.stage,
+            'error': type(self.error).__name__,
+            'message': str(self.error),
+            'traceback': self.traceback,
+            'item': self.item,
+        }, default=repr)
+
+    def __repr__(self):
+        return "DeadLetter({!r}, {}, {!r})".format(self.item, self.stage,
+                                                   self.error)
+
+
+def attempt(run: Callable, args: tuple):
+    """
+    :param run: A Plan's run_located.
+    :param args: The item's argument tuple.
+    :return: the result, or a DeadLetter if a stage raised.
+    """
+    try:
+        return run(args)
+    except StageError as e:
+        item = args[0] if len(args) == 1 else args
+        return DeadLetter.from_stage_error(item, e)
+
+
+def attempt_outputs(plan: Plan, args: tuple) -> Iterator:
+    """
+    :param plan: A plan with fan-out stages.
+    :param args: The item's argument tuple.
+    :return: a generator over the item's outputs, ending with a DeadLetter
+        if a stage raised. Outputs made before the failure are kept.
+    """
+    try:
+        yield from plan.iter_outputs(args, located=True)
+    except StageError as e:
+        item = args[0] if len(args) == 1 else args
+        yield DeadLetter.from_stage_error(item, e)
+
+
+class DeadLetters:
+    """
+    A sink for failed items, with an error budget.
+
+    Up to cap letters are kept in memory (in ``letters``); if a path is
+    given, every letter is also appended to it as JSON Lines. Once at least
+    min_items have been seen, a failure rate above max_error_rate raises
+    ErrorBudgetExceeded, as does exceeding max_errors failures at any point.
+    """
+
+    def __init__(self, path: str = None, cap: int = 1000,
+                 max_error_rate: float = None, min_items: int = 1000,
+                 max_errors: int = None):
+        """
+        :param path: An optional JSON Lines file to append letters to.
+        :param cap: The maximum number of letters kept in memory.
+        :param max_error_rate: The tolerated fraction of failed items.
+        :param min_items: The number of items seen before the rate applies.
+        :param max_errors: The tolerated number of failed items.
+        """
+        self.path = path
+        self.cap = cap
+        self.max_error_rate = max_error_rate
+        self.min_items = min_items
+        self.max_errors = max_errors
+
+        self.letters = []
+        self.seen = 0
+        self.failed = 0
+        self._fp = open(path, 'a', encoding='utf-8') if path else None
+
+    def add(self, letter: DeadLetter):
+        """
+        Record a failed item, then check the budget.
+
+        :param letter: The failure.
+        """
+        self.failed += 1
+        if len(self.letters) < self.cap:
+            self.letters.append(letter)
+        if self._fp is not None:
+            self._fp.write(letter.to_json() + '\n')
+        self.check()
+
+    def check(self):
+        """
+        :raises ErrorBudgetExceeded: if the failures so far are over budget.
+        """
+        if self.max_errors is not None and self.failed > self.max_errors:
+            msg = "{} items failed, more than the {} allowed"
+            raise ErrorBudgetExceeded(msg.format(self.failed,
+                                                 self.max_errors))
+
+        rate = self.max_error_rate
+        over_rate = rate is not None and self.failed > rate * self.seen
+        if over_rate and self.seen >= self.min_items:
+            msg = "{} of {} items failed, over the {:.2%} allowed"
+            raise ErrorBudgetExceeded(msg.format(
+                self.failed, self.seen, self.max_error_rate))
+
+    def route(self, results: Iterable, flatten: bool = False) -> Iterator:
+        """
+        :param results: Results, with DeadLetters in place of failed items.
+        :param flatten: if True, each result is an iterable of an item's
+            outputs (from a pipeline with fan-out stages), and those are
+            yielded one by one. A DeadLetter among them is added here.
+        :return: a generator over the successful results; the failures are
+            added here.
+        """
+        for res in results:
+            self.seen += 1
+            if isinstance(res, DeadLetter):
+                self.add(res)
+                continue
+
+            if self.seen == self.min_items:
+                self.check()
+            if flatten:
+                for out in res:
+                    if isinstance(out, DeadLetter):
+                        self.add(out)
+                    else:
+                        yield out
+            else:
+                yield res
+
+    def close(self):
+        if self._fp is not None:
+            self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.failed
+
+
+def imap_attempts(plan: Plan, iterable: Iterable,
+                  batch_size: int = 256) -> Iterator:
+    """
+    :param plan: The compiled plan.
+    :param iterable: The items to process.
+    :param batch_size: The group size for batch-aware stages.
+    :return: a generator over the results, with DeadLetters in place of
+        failed items. With fan-out stages, each result is a generator over
+        an item's outputs (see attempt_outputs).
+    """
+    run = plan.run_located
+
+    if plan.is_fan_out:
+        for item in iterable:
+            yield attempt_outputs(plan, (item,))
+        return
+
+    if not plan.is_batched:
+        for item in iterable:
+            yield attempt(run, (item,))
+        return
+
+    # Groups run together as usual. If one fails, it is re-run an item at a
+    # time to find the bad records.
+    it = iter(iterable)
+    while True:
+        group = [(item,) for item in islice(it, batch_size)]
+        if not group:
+            return
+        try:
+            yield from plan.run_batch(group)
+        except Exception:
+            for args in group:
+                yield attempt(run, args)
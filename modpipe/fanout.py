@@ -0,0 +1,35 @@
+from modpipe.callables import is_async_callable
+
+FAN_OUT_ATTR = '__modpipe_fan_out__'
+
+
+def fan_out(f):
+    """
+    Mark a stage as fanning out.
+
+    A fan-out stage returns an iterable (typically it's a generator), and
+    each value it yields continues through the remaining stages as an item
+    of its own, like Spark's flatMap. Each yielded value means what a
+    normal stage's return value would: None passes the input through, and
+    a Done or SkipTo applies to just that value.
+
+    In imap (and so map and run), values are streamed one at a time, so
+    memory stays bounded however many are yielded. Called directly, a
+    pipeline with a fan-out stage returns a list of all of an item's
+    outputs.
+
+    :param f: The stage to mark.
+    :return: the marked stage.
+    """
+    if is_async_callable(f):
+        raise TypeError("Can't fan out async stage {}".format(f))
+    setattr(f, FAN_OUT_ATTR, True)
+    return f
+
+
+def is_fan_out(f) -> bool:
+    """
+    :param f: A pipeline callable.
+    :return: True if it was marked with fan_out.
+    """
+    return getattr(f, FAN_OUT_ATTR, False)
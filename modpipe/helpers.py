@@ -1,7 +1,7 @@
-import re
+import ast
 from collections import OrderedDict
-from inspect import getmodule, getsourcelines, getsource, signature, Signature
-from typing import Mapping, Callable
+from inspect import getmodule, getsource, signature, Signature, unwrap
+from typing import Mapping, Callable, Set
 from types import ModuleType
 from typing import Iterator, Tuple
 
@@ -63,35 +63,82 @@ def remove_from_pipeline_seq(pipeline_seq: Mapping[str, object], predicate: Call
         del pipeline_seq[k]
 
 
-def sequence_objects(module: ModuleType, items: BindingSeq) -> BindingSeq:
+def parse_module(module: ModuleType) -> ast.Module:
+    """
+    :param module: A loaded module
+    :return: the module's parsed source.
+    """
+    return ast.parse(getsource(module))
+
+
+def _iter_module_level(stmts):
+    # Statements that bind at module level, including those nested in
+    # if/try/with/for blocks, but not inside function or class bodies.
+    for stmt in stmts:
+        yield stmt
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef,
+                             ast.ClassDef)):
+            continue
+        for field in ('body', 'orelse', 'finalbody', 'handlers'):
+            yield from _iter_module_level(getattr(stmt, field, ()))
+
+
+def binding_linenos(tree: ast.Module) -> Mapping[str, int]:
+    """
+    :param tree: A parsed module.
+    :return: a map from each module-level name bound by a def or an
+        assignment to the (1-based) line number of its last binding.
+    """
+    linenos = {}
+
+    for stmt in _iter_module_level(tree.body):
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            linenos[stmt.name] = stmt.lineno
+        elif isinstance(stmt, (ast.Assign, getattr(ast, 'AnnAssign', ()))):
+            targets = getattr(stmt, 'targets', None) or [stmt.target]
+            for target in targets:
+                for node in ast.walk(target):
+                    if isinstance(node, ast.Name):
+                        linenos[node.id] = stmt.lineno
+
+    return linenos
+
+
+def sequence_objects(module: ModuleType, items: BindingSeq,
+                     tree: ast.Module = None) -> BindingSeq:
     """
     :param module: The module to extract callable definitions from.
     :type module: ModuleType
     :param items: The callables and bindings for extraction.
     :type items: Iterator[Tuple[str, object]]
+    :param tree: The module's parsed source, if already parsed.
     :returns: a list of (name, callable) pairs sorted by source line number
     """
-    items, linenos, missing = list(items), {}, set()
+    items, linenos = list(items), {}
+    module_file = getattr(module, '__file__', None)
+    bound_at = None
 
-    # First try to get the line numbers via getsourcelines.
     for k, obj in items:
-        try:
-            if obj.__module__ == module.__name__:
-                linenos[k] = getsourcelines(obj)[-1]
-            else:
-                missing.add(k)  # Not in module
-        except TypeError:
-            missing.add(k)  # i.e. class instance
-
-    # Now find any instantiated objects.
-    missing_re = re.compile("^({})".format("|".join(missing)))
-    for lineno, line in enumerate(getsource(module).splitlines()):
-        match = missing_re.match(line)
-        if match:
-            linenos[match.group(0)] = lineno
+        # Functions know their own line; no need to touch the source.
+        code = getattr(unwrap(obj), '__code__', None)
+        defined_here = all((
+            code is not None,
+            getattr(obj, '__module__', None) == module.__name__,
+            getattr(code, 'co_filename', None) == module_file,
+        ))
+        if defined_here:
+            linenos[k] = code.co_firstlineno
+            continue
+
+        # Everything else (e.g. class instances) is found by its binding,
+        # resolved from a single parse of the module.
+        if bound_at is None:
+            bound_at = binding_linenos(tree or parse_module(module))
+        if k in bound_at:
+            linenos[k] = bound_at[k]
 
     # Verify all objects found.
-    still_missing = missing - set(linenos)
+    still_missing = {k for k, _ in items} - set(linenos)
     if still_missing:
         raise RuntimeError("Unable to resolve: {}".format(still_missing))
 
@@ -137,15 +184,63 @@ def compile_signatures(pipeline_seq: BindingSeq, assert_unif=False, ignore_names
     return dict(signatures)
 
 
-def load_pipeline_seq(module: ModuleType, elide_helpers=True, *predicates) -> BindingSeq:
+def _skip_target_name(node):
+    if isinstance(node, ast.Name):
+        return node.id
+
+    try:
+        value = ast.literal_eval(node)
+    except ValueError:
+        return None
+
+    return value if isinstance(value, str) else None
+
+
+def find_skip_targets(module: ModuleType,
+                      tree: ast.Module = None) -> Mapping[str, Set[str]]:
+    """
+    Statically find the SkipTo targets named by each top-level function.
+
+    :param module: The module to scan.
+    :param tree: The module's parsed source, if already parsed.
+    :return: a map from function name to the set of names it passes as the
+        first argument to SkipTo.
+    """
+    targets = {}
+
+    for node in (tree or parse_module(module)).body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+
+        names = set()
+        for sub in ast.walk(node):
+            if not isinstance(sub, ast.Call) or not sub.args:
+                continue
+            func = sub.func
+            func_name = getattr(func, 'id', getattr(func, 'attr', None))
+            if func_name == 'SkipTo':
+                name = _skip_target_name(sub.args[0])
+                if name is not None:
+                    names.add(name)
+
+        targets[node.name] = names
+
+    return targets
+
+
+def load_pipeline_seq(module: ModuleType, elide_helpers=True, *predicates,
+                      tree: ast.Module = None) -> BindingSeq:
     """
     :param module: The module to load from
     :param elide_helpers: if True, remove all conventionally-designated
         helper functions.
     :param predicates: Predicates to remove_from_pipeline_seq
+    :param tree: The module's parsed source, if already parsed.
     :return: an OrderedDict mapping name to callable.
     """
-    pairs = sequence_objects(module, iter_pipelineable(iter_defined_in(module)))
+    pairs = sequence_objects(module,
+                             iter_pipelineable(iter_defined_in(module)),
+                             tree)
     pipeline_seq = OrderedDict(pairs)
 
     if elide_helpers:
@@ -0,0 +1,126 @@
+import sys
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Mapping
+
+from modpipe.callables import is_async_callable
+
+MEMOIZE_ATTR = '__modpipe_memoize__'
+
+
+def memoize(f=None, maxsize: int = 4096, maxbytes: int = None):
+    """
+    Mark a stage as a pure function of its input so that ModPipe caches its
+    results.
+
+    Usable bare (``@memoize``) or with limits (``@memoize(maxsize=100)``).
+    The callable itself is returned unchanged, so calling it directly from
+    module code doesn't touch the cache. Inputs that aren't hashable
+    bypass the cache.
+
+    :param f: The stage to mark.
+    :param maxsize: The maximum number of cached entries.
+    :param maxbytes: The maximum approximate size of the cached keys and
+        values, as measured by sys.getsizeof (i.e. shallowly).
+    :return: the marked stage, or a decorator if f isn't given.
+    """
+    def mark(f):
+        if is_async_callable(f):
+            raise TypeError("Can't memoize async stage {}".format(f))
+        setattr(f, MEMOIZE_ATTR, (maxsize, maxbytes))
+        return f
+
+    return mark if f is None else mark(f)
+
+
+def memo_options(f):
+    """
+    :param f: A pipeline callable.
+    :return: the (maxsize, maxbytes) it was marked with, or None.
+    """
+    return getattr(f, MEMOIZE_ATTR, None)
+
+
+class StageCache:
+    """
+    A bounded LRU cache of one stage's results, keyed by its arguments.
+    """
+
+    def __init__(self, maxsize: int = 4096, maxbytes: int = None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.uncacheable = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def wrap(self, f: Callable) -> Callable:
+        """
+        :param f: The stage callable.
+        :return: a callable with the same calling convention that consults
+            the cache first.
+        """
+        entries, lock = self._entries, self._lock
+
+        def cached(*args):
+            try:
+                with lock:
+                    res = entries[args]
+                    entries.move_to_end(args)
+                    self.hits += 1
+                return res
+            except KeyError:
+                pass
+            except TypeError:  # Unhashable arguments.
+                self.uncacheable += 1
+                return f(*args)
+
+            res = f(*args)
+            self._put(args, res)
+            return res
+
+        return cached
+
+    def _put(self, key, value):
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+
+        with self._lock:
+            self.misses += 1
+            if key in self._entries:
+                return
+
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.nbytes += size
+
+            while self._entries and self._over_limit():
+                old_key, _ = self._entries.popitem(last=False)
+                self.nbytes -= self._sizes.pop(old_key)
+
+    def _over_limit(self) -> bool:
+        if len(self._entries) > self.maxsize:
+            return True
+        return self.maxbytes is not None and self.nbytes > self.maxbytes
+
+    def info(self) -> Mapping[str, int]:
+        return OrderedDict([
+            ('hits', self.hits),
+            ('misses', self.misses),
+            ('uncacheable', self.uncacheable),
+            ('size', len(self._entries)),
+            ('bytes', self.nbytes),
+            ('maxsize', self.maxsize),
+            ('maxbytes', self.maxbytes),
+        ])
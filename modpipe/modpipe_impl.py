@@ -1,16 +1,45 @@
+import sys
+from collections import OrderedDict
+from functools import partial
 from importlib import import_module
-from inspect import getfile
 from importlib import reload
+from itertools import chain as chain_iterables
+from operator import is_not
+from threading import RLock
 from types import ModuleType
 
-from modpipe.results import Result, Done, SkipTo
-from modpipe.helpers import compile_signatures, load_pipeline_seq
+from modpipe.memo import StageCache, memo_options
+from modpipe.plan import Plan
+from modpipe.results import Drop
+from modpipe.sources import changed_sources, discard_bytecode, \
+    fingerprint_sources
+from modpipe.stats import StageStats
+
+_not_dropped = partial(is_not, Drop)
+
+
+def _without_drops(results):
+    # A C-level filter where possible, but generators (which may hold pools,
+    # threads or open transactions) stay closeable.
+    if not hasattr(results, 'close'):
+        return filter(_not_dropped, results)
+    return _closing_filter(results)
+
+
+def _closing_filter(results):
+    try:
+        for res in results:
+            if res is not Drop:
+                yield res
+    finally:
+        results.close()
 
 
 class ModPipe:
 
     @classmethod
-    def on(cls, module_dot_path, unif_sigs=False, ignore_names=True):
+    def on(cls, module_dot_path, unif_sigs=False, ignore_names=True,
+           watch_imports=False):
         """
 
         :param module: The module to turn into a pipe, as a fully
@@ -20,20 +49,74 @@ class ModPipe:
         :param ignore_names: if True, then enforce the expectation that
             every callable in the pipeline has the same signature,
             including argument names.
+        :param watch_imports: if True, reload also checks (and reloads)
+            the local modules that the pipeline module imports.
         :return: an instantiated ModPipe
         """
-        return ModPipe(module_dot_path, unif_sigs, ignore_names)
+        return ModPipe(module_dot_path, unif_sigs, ignore_names,
+                       watch_imports)
+
+    @classmethod
+    def chain(cls, *modules, **kwargs):
+        """
+        Flatten several modules into a single pipeline, so that
+        ``ModPipe.chain('a', 'b', 'c')(x)`` is like ``c(b(a(x)))`` but runs
+        as one plan: a Done anywhere ends the whole chain, a SkipTo can
+        target a stage in a later module, and every bulk mode applies.
+
+        :param modules: Module dot paths, modules or ModPipes, in order.
+        :param kwargs: Options for ModPipe.on, for components that aren't
+            ModPipes already.
+        :return: a Chain.
+        """
+        from modpipe.chain import Chain
+        return Chain([m if isinstance(m, ModPipe) else cls.on(m, **kwargs)
+                      for m in modules])
 
-    def __init__(self, module, unif_sigs=False, ignore_names=True):
+    def __add__(self, other):
+        """
+        :param other: A ModPipe or module to run after this one.
+        :return: a Chain of the two (see ModPipe.chain).
+        """
+        return ModPipe.chain(self, other)
+
+    def __radd__(self, other):
+        return ModPipe.chain(other, self)
+
+    def __init__(self, module, unif_sigs=False, ignore_names=True,
+                 watch_imports=False):
         if isinstance(module, ModuleType):
             module = module.__name__
 
         self._module_dot_path = module
         self._unif_sigs = unif_sigs
         self._ignore_names = ignore_names
+        self._watch_imports = watch_imports
+        self._lock = RLock()
+        self._stage_stats = None
+        self._tracer = None
+        self._caches = {}
+        self._sources = None
+        self._stages_deleted = False
 
         self.reload()
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        # Caches hold closures and locks, so ship the bare plan and
+        # rebuild the rest on the other side.
+        state['_plan'] = self._plan.bare()
+        state['_caches'] = {}
+        # Traces (and sampling predicates) stay with this process.
+        state['_tracer'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = RLock()
+        self._install(self._plan)
+
     @property
     def module_name(self):
         return self._module_name
@@ -42,31 +125,290 @@ class ModPipe:
     def abs_module_path(self):
         return self._module_path
 
-    def reload(self):
+    @property
+    def _pipeline(self):
+        return self._plan.pipeline
+
+    @property
+    def _signatures(self):
+        return self._plan.signatures
+
+    @property
+    def _expected_args(self):
+        return self._plan.expected_args
+
+    def reload(self, force=False, validate=False):
         """
         Reloads the module and all pipeline elements.
+
+        Stages removed with ``del`` are restored. Otherwise, if the module's
+        source file hasn't changed since the last reload, this is a no-op:
+        checking costs a stat call (plus a hash if the file was touched).
+        With watch_imports, an edit to an imported local module reloads
+        that module first, then the pipeline module. Changed modules are
+        always compiled from source, since their cached bytecode may
+        predate an edit that left the file's size and mtime (in seconds)
+        unchanged.
+
+        The new pipeline is built off to the side and swapped in with a
+        single assignment, so concurrent callers see either the old or the
+        new pipeline, never a mix.
+
+        :param force: if True, reload even if nothing changed.
+        :param validate: if True, execute the new source into a fresh
+            module object rather than re-executing the loaded one, and
+            likewise for changed imported modules. If that fails (e.g. a
+            module-level assertion or a signature check), the exception
+            propagates and the loaded modules and pipeline are left
+            untouched; otherwise the fresh modules replace them in
+            sys.modules. (Other modules that imported a replaced one keep
+            the old one.)
+        """
+        with self._lock:
+            changed = []
+            if not force and self._sources is not None:
+                changed = changed_sources(self._sources)
+                if not changed and not self._stages_deleted:
+                    return
+
+            # Don't save a ref to module. It's not picklable.
+            module = import_module(self._module_dot_path)
+            deps = [sys.modules[name] for name in changed
+                    if name != module.__name__ and name in sys.modules]
+            for m in deps + [module]:
+                discard_bytecode(m)
+
+            if not validate:
+                for dep in deps:
+                    reload(dep)
+                module = reload(module)
+                plan = self._compile(module)
+            else:
+                from importlib.util import module_from_spec
+
+                replaced = {}
+                try:
+                    # Dependencies first, so the pipeline module imports
+                    # their fresh copies.
+                    for old in deps + [module]:
+                        replaced[old.__name__] = old
+                        module = module_from_spec(old.__spec__)
+                        sys.modules[old.__name__] = module
+                        module.__spec__.loader.exec_module(module)
+                    plan = self._compile(module)
+                except BaseException:
+                    sys.modules.update(replaced)
+                    raise
+
+            self._module_name = module.__name__
+            self._module_path = module.__file__
+            self._sources = fingerprint_sources(module, self._watch_imports)
+            self._stages_deleted = False
+            self._install(plan)
+
+    def _compile(self, module: ModuleType) -> Plan:
+        # Source introspection is only needed here, not on the
+        # from_manifest path, so don't pay for importing it up front.
+        from modpipe.helpers import compile_signatures, \
+            find_skip_targets, load_pipeline_seq, parse_module
+
+        tree = parse_module(module)
+        pipeline = load_pipeline_seq(module, tree=tree)
+
+        assert len(pipeline) > 0, "No elements in pipeline."
+
+        signatures = compile_signatures(pipeline,
+                                        self._unif_sigs,
+                                        self._ignore_names)
+        return Plan(pipeline, signatures, find_skip_targets(module, tree))
+
+    def _source_paths(self) -> list:
+        return [fp[0] for fp in (self._sources or {}).values()]
+
+    def watch(self, interval=1.0, on_reload=None, on_error=None,
+              use_inotify=True):
+        """
+        Reload the pipeline in the background whenever its source changes.
+
+        Each reload is validated (see reload) before the new pipeline is
+        swapped in, so a broken edit leaves the running pipeline in place.
+        Items in flight finish on the pipeline they started with, and
+        callers never wait on a reload.
+
+        :param interval: The seconds between checks for changes.
+        :param on_reload: Called with this ModPipe after each swap.
+        :param on_error: Called with the exception when a changed source
+            fails to load. It isn't retried until the source changes again.
+        :param use_inotify: if True and the optional inotify_simple package
+            is installed, wake up on file events instead of only polling.
+        :return: the running Watcher; call its stop method to stop it.
         """
-        # Don't save a ref to module. It's not picklable.
-        module = reload(import_module(self._module_dot_path))
-        self._module_name = module.__name__
-        self._module_path = getfile(module)
-        self._pipeline = load_pipeline_seq(module)
+        from modpipe.watch import Watcher
+        return Watcher(self, interval, on_reload, on_error,
+                       use_inotify).start()
+
+    def _install(self, plan: Plan):
+        # Caches are keyed by (binding, code hash, limits), so unchanged
+        # stages keep their entries across reloads and edited ones don't.
+        caches, stage_caches = {}, []
+        all_options = [memo_options(f) for f in plan.pipeline.values()]
+        if any(options is not None for options in all_options):
+            for key, options in zip(plan.fingerprints, all_options):
+                if options is None:
+                    stage_caches.append(None)
+                    continue
+                cache_key = key + options
+                cache = self._caches.get(cache_key)
+                if cache is None:
+                    cache = StageCache(*options)
+                caches[cache_key] = cache
+                stage_caches.append(cache)
+
+        self._caches = caches
+        if caches:
+            plan = plan.memoized(stage_caches)
+
+        if self._stage_stats is not None:
+            # Keyed by (binding, code hash), so unchanged stages keep their
+            # history across reloads and edited ones start fresh.
+            kept = {key: self._stage_stats.get(key) or StageStats()
+                    for key in plan.fingerprints}
+            self._stage_stats = kept
+            plan = plan.instrumented(kept[key] for key in plan.fingerprints)
+
+        if self._tracer is not None:
+            plan = plan.traced(self._tracer)
 
-        assert len(self._pipeline) > 0, "No elements in pipeline."
+        self._plan = plan
 
-        self._signatures = compile_signatures(self._pipeline,
-                                              self._unif_sigs,
-                                              self._ignore_names)
-        self._expected_args = {k: len(sig.parameters)
-                               for k, sig in self._signatures.items()}
+    def cache_info(self):
+        """
+        :return: an OrderedDict from the binding of each memoized stage to
+            its cache's hits, misses, uncacheable calls, size and bytes.
+        """
+        info = OrderedDict()
+        for key, f in zip(self._plan.fingerprints, self._pipeline.values()):
+            options = memo_options(f)
+            if options is not None:
+                info[key[0]] = self._caches[key + options].info()
+        return info
+
+    def clear_caches(self):
+        """
+        Empty the caches of all memoized stages.
+        """
+        for cache in self._caches.values():
+            cache.clear()
 
     def __delitem__(self, k):
-        f = self._pipeline[k]
-        del self._pipeline[k]
-        del self._signatures[f]
-        del self._expected_args[f]
+        with self._lock:
+            self._install(self._plan.without(k))
+            self._stages_deleted = True
+
+    def enable_stats(self):
+        """
+        Start recording per-stage call counts, latencies and exits.
+
+        Uninstrumented pipelines run a separate loop, so this costs nothing
+        until enabled. Only synchronous, in-process runs (``__call__``,
+        ``map``, ``imap`` and ``tmap``) are recorded. Pipelines with fan-out
+        stages aren't recorded at all, and those with batch stages only for
+        items run one at a time, such as those sampled for tracing.
+        """
+        with self._lock:
+            if self._stage_stats is None:
+                self._stage_stats = {}
+                self._install(self._plan.bare())
+
+    def disable_stats(self):
+        """
+        Stop recording and discard all recorded stats.
+        """
+        with self._lock:
+            if self._stage_stats is not None:
+                self._stage_stats = None
+                self._install(self._plan.bare())
+
+    def reset_stats(self):
+        """
+        Zero all recorded stats without disabling recording.
+        """
+        for st in (self._stage_stats or {}).values():
+            st.reset()
+
+    def stats(self):
+        """
+        :return: an OrderedDict from stage binding to a summary of its
+            calls, errors, None passthroughs, Done and SkipTo exits, and
+            total, mean and percentile latencies (in seconds). Empty if
+            stats are disabled.
+        """
+        stats = OrderedDict()
+        if self._stage_stats is not None:
+            for key in self._plan.fingerprints:
+                stats[key[0]] = self._stage_stats[key].summary()
+        return stats
+
+    def enable_tracing(self, rate=0.01, predicate=None, capacity=1000):
+        """
+        Start tracing a sample of items: the value entering and leaving
+        each stage, and how each stage exited.
+
+        Unsampled items pay only for the sampling decision. Like stats,
+        only synchronous, per-item runs (``__call__``, ``map``, ``imap`` and
+        ``tmap``) are traced. Pipelines with batch stages run ``map`` and
+        ``imap`` in groups, so only their ``__call__`` and ``tmap`` items
+        are traced, and pipelines with fan-out stages aren't traced at all.
+
+        :param rate: The fraction of items to trace, if no predicate.
+        :param predicate: If given, trace exactly the items it returns True
+            for, called with each item's arguments.
+        :param capacity: The number of most recent traces kept.
+        :return: the Tracer, whose dump method returns the traces.
+        """
+        from modpipe.tracing import Tracer
+
+        with self._lock:
+            self._tracer = Tracer(rate, predicate, capacity)
+            self._install(self._plan.bare())
+        return self._tracer
+
+    def disable_tracing(self):
+        """
+        Stop tracing and discard all traces.
+        """
+        with self._lock:
+            if self._tracer is not None:
+                self._tracer = None
+                self._install(self._plan.bare())
+
+    def traces(self):
+        """
+        :return: the buffered traces, oldest first, as dicts (see
+            Tracer.dump). Empty if tracing is disabled.
+        """
+        return [] if self._tracer is None else self._tracer.dump()
+
+    def drop_counts(self):
+        """
+        :return: an OrderedDict from each stage's binding to the number of
+            items it returned Drop for since the pipeline was last loaded.
+        """
+        return OrderedDict(zip(self._plan.names, self._plan.drops))
 
     def __getitem__(self, k):
+        """
+        :param k: A stage binding, or a slice of bindings (or indices) such
+            as ``f['clean':'enrich']``. As with lists, the stop stage is
+            excluded.
+        :return: the stage's callable, or for a slice, a PipeSlice view
+            that runs just those stages.
+        """
+        if isinstance(k, slice):
+            from modpipe.slicing import PipeSlice
+            if k.step is not None:
+                raise ValueError("Pipeline slices can't have a step")
+            return PipeSlice(self, k.start, k.stop)
         return self._pipeline[k]
 
     def _ipython_key_completions_(self):
@@ -83,18 +425,357 @@ class ModPipe:
         return False   # Don't swallow.
 
     def __call__(self, *args):
-        res = Result(args)
+        return self._plan.run(args)
+
+    def acall(self, *args):
+        """
+        Run one item through a pipeline that may have ``async def`` stages.
+
+        :return: an awaitable for the final value.
+        """
+        from modpipe.aio import arun
+        return arun(self._plan, args)
+
+    def amap(self, iterable, concurrency=64):
+        """
+        Run items through the pipeline, interleaving up to ``concurrency``
+        of them across the await points of async stages. Sync stages still
+        run inline.
+
+        :param iterable: The items to process, as an async or plain
+            iterable.
+        :param concurrency: The bound on in-flight items.
+        :return: an async generator over the results, in input order.
+        """
+        from modpipe.aio import amap
+        return amap(self._plan, iterable, concurrency)
+
+    def imap(self, iterable, checkpoints=None, batch_size=256,
+             dead_letters=None):
+        """
+        Lazily run every item in an iterable through the pipeline.
+
+        Each item is passed as the sole argument, i.e. ``f(item)``. The plan
+        is captured once up front, so a concurrent reload doesn't change
+        the pipeline mid-stream.
+
+        :param iterable: The items to process.
+        :param checkpoints: An optional Checkpoints store. If given, each
+            item resumes from its deepest stage that hasn't changed since
+            the last run, and new per-stage outputs are recorded.
+        :param batch_size: The number of consecutive items grouped together
+            for batch-aware stages, if there are any.
+        :param dead_letters: An optional DeadLetters sink. If given, items
+            whose stages raise are added to it (and left out of the
+            results) instead of aborting the run, until its error budget
+            is exceeded.
+        :return: an iterator over the results, in input order.
+        """
+        plan = self._plan
+        keep_going = dead_letters is not None
+
+        if checkpoints is not None:
+            results = checkpoints.run(plan, iterable, keep_going)
+        elif keep_going:
+            from modpipe.deadletter import imap_attempts
+            results = imap_attempts(plan, iterable, batch_size)
+        elif plan.is_batched:
+            results = plan.imap_batched(iterable, batch_size)
+        elif plan.is_fan_out:
+            outputs = map(plan.iter_outputs, zip(iterable))
+            results = chain_iterables.from_iterable(outputs)
+        else:
+            # zip(iterable) wraps each item in a 1-tuple at C speed.
+            results = map(plan.run, zip(iterable))
+
+        if keep_going:
+            results = dead_letters.route(results, plan.is_fan_out)
+        return _without_drops(results)
+
+    def map(self, iterable, checkpoints=None, batch_size=256,
+            dead_letters=None) -> list:
+        """
+        :param iterable: The items to process.
+        :param checkpoints: An optional Checkpoints store (see imap).
+        :param batch_size: The group size for batch-aware stages.
+        :param dead_letters: An optional DeadLetters sink (see imap).
+        :return: a list of results, in input order.
+        """
+        return list(self.imap(iterable, checkpoints, batch_size,
+                              dead_letters))
+
+    def manifest(self) -> dict:
+        """
+        Describe the loaded pipeline's resolved stage order and arities as
+        a JSON-serializable dict.
+
+        ModPipe.from_manifest rebuilds an equivalent pipeline from it
+        without any source introspection, which is what worker processes
+        do.
+
+        :return: the manifest.
+        """
+        source = self._sources.get(self._module_name) if self._sources \
+            else None
+        return {
+            'module': self._module_dot_path,
+            'unif_sigs': self._unif_sigs,
+            'ignore_names': self._ignore_names,
+            'watch_imports': self._watch_imports,
+            'source_sha1': source[3] if source else None,
+            'stages': [[name, arity] for name, (_, arity)
+                       in zip(self._plan.names, self._plan.steps)],
+        }
+
+    @classmethod
+    def from_manifest(cls, manifest: dict) -> 'ModPipe':
+        """
+        Rebuild a pipeline from ModPipe.manifest.
+
+        This imports the module but skips reading and parsing its source
+        and computing signatures. If the module's source no longer matches
+        the manifest, it falls back to a full load (keeping only the
+        manifest's stages).
 
-        for k, f in self._pipeline.items():
+        :param manifest: The manifest.
+        :return: an instantiated ModPipe
+        """
+        if 'chain' in manifest:
+            from modpipe.chain import Chain
+            return Chain.from_manifest(manifest)
+
+        pipe = cls.__new__(cls)
+        pipe._module_dot_path = manifest['module']
+        pipe._unif_sigs = manifest['unif_sigs']
+        pipe._ignore_names = manifest['ignore_names']
+        pipe._watch_imports = manifest['watch_imports']
+        pipe._lock = RLock()
+        pipe._stage_stats = None
+        pipe._tracer = None
+        pipe._caches = {}
+        pipe._sources = None
+        pipe._stages_deleted = False
+
+        module = import_module(pipe._module_dot_path)
+        sources = fingerprint_sources(module, pipe._watch_imports)
+        source = sources.get(module.__name__)
+        names = [name for name, _ in manifest['stages']]
+
+        if source is None or source[3] != manifest['source_sha1']:
+            pipe.reload(force=True)
+            for k in list(pipe._pipeline):
+                if k not in names:
+                    del pipe[k]
+            return pipe
+
+        pipeline = OrderedDict((name, getattr(module, name)) for name in names)
+        arities = {f: arity for f, (_, arity)
+                   in zip(pipeline.values(), manifest['stages'])}
+
+        pipe._module_name = module.__name__
+        pipe._module_path = module.__file__
+        pipe._sources = sources
+        pipe._install(Plan(pipeline, arities=arities))
+        return pipe
+
+    def run(self, source, sink, write_every=4096, prefetch=True, **kwargs):
+        """
+        Stream a source through the pipeline into a sink.
 
-            res = res.apply_to(f, self._expected_args[f])
+        With prefetch, a background thread reads ahead from the source, and
+        results are written in batches, so the pipeline itself stays
+        busy rather than waiting on I/O.
+
+        :param source: An iterable of items, e.g. from modpipe.streams'
+            read_jsonl, read_csv or read_lines.
+        :param sink: Anything with a write_many(list) method (e.g. the
+            writers in modpipe.streams), or a list to extend.
+        :param write_every: The number of results per write.
+        :param prefetch: if True, read the source on a background thread.
+        :param kwargs: Passed to imap.
+        :return: the number of results written.
+        """
+        from modpipe import streams
+
+        if prefetch:
+            source = streams.prefetch(source)
+
+        write_many = sink.extend if isinstance(sink, list) else sink.write_many
+
+        count = 0
+        for chunk in streams.chunked(self.imap(source, **kwargs), write_every):
+            write_many(chunk)
+            count += len(chunk)
+
+        return count
+
+    def _worker_spec(self) -> dict:
+        return self.manifest()
+
+    def pmap(self, iterable, workers=None, chunksize=64, ordered=True,
+             dead_letters=None, shared_memory=0, max_pending=None):
+        """
+        Run items through the pipeline on a process pool.
+
+        Each worker rebuilds the pipeline once from the module's dot path
+        (keeping only the stages this instance retains), so only items and
+        results cross process boundaries.
+
+        :param iterable: The items to process.
+        :param workers: The number of processes (defaults to the CPU count).
+        :param chunksize: The number of items sent to a worker at once,
+            which is also the group size for batch-aware stages.
+        :param ordered: if True, yield results in input order; otherwise,
+            in completion order.
+        :param dead_letters: An optional DeadLetters sink (see imap).
+        :param shared_memory: If nonzero, the size in bytes of a shared
+            memory ring buffer through which large bytes, bytearray,
+            memoryview and NumPy array items are sent to workers, instead
+            of being pickled. Large results of those types come back
+            through shared memory too. Requires Python 3.8+.
+        :param max_pending: The bound on chunks in flight, which is also
+            how far ahead the input is read (defaults to four per worker).
+        :return: a generator over the results.
+        """
+        spec, keep_going = self._worker_spec(), dead_letters is not None
+
+        if shared_memory:
+            from modpipe import shm
+            results = shm.pmap_shared(spec, iterable, workers, chunksize,
+                                      ordered, keep_going, shared_memory,
+                                      max_pending)
+        else:
+            from modpipe import parallel
+            results = parallel.pmap(spec, iterable, workers, chunksize,
+                                    ordered, keep_going, max_pending)
+        return self._flatten(results, dead_letters)
+
+    def smap(self, iterable, segments=None, chunksize=64, queue_size=4,
+             processes=False):
+        """
+        Run items through the pipeline with its stages split into
+        segments that work concurrently, each on its own thread (or
+        process), connected by bounded queues.
+
+        This suits pipelines with a few heavy stages that release the GIL:
+        while one segment compresses chunk k, the next can parse chunk
+        k - 1. Items finished with Done, or skipping past a segment, pass
+        through it untouched, and results come back in input order.
+
+        :param iterable: The items to process.
+        :param segments: None for a segment per stage, a number of segments,
+            or the names of the stages that begin new segments.
+        :param chunksize: The number of items handed between segments at
+            once.
+        :param queue_size: The number of chunks buffered between segments.
+        :param processes: if True, run segments in processes that each
+            rebuild the pipeline, rather than in threads.
+        :return: a generator over the results.
+        """
+        from modpipe import segments as segmented
+        spec = self._worker_spec() if processes else None
+        results = segmented.smap(self._plan, iterable, segments, chunksize,
+                                 queue_size, spec)
+        return _without_drops(results)
+
+    def aggregate(self, iterable, key, agg, value=None, max_keys=1000000,
+                  spill_dir=None, workers=None, chunksize=1024,
+                  max_pending=None, **kwargs):
+        """
+        Run items through the pipeline, folding the outputs into per-key
+        accumulators as they stream, e.g. counts, sums or distinct sets
+        by key, without materializing the outputs.
+
+        Memory is bounded by max_keys: beyond it, accumulators spill to
+        sorted run files that are merged when the results are read.
+
+        :param iterable: The items to process.
+        :param key: Maps an output to its key. Keys must be orderable.
+        :param agg: An Agg from modpipe.aggregate, e.g. Count() or Sum().
+        :param value: Maps an output to the value aggregated (by default,
+            the output itself).
+        :param max_keys: The number of keys held in memory before spilling.
+        :param spill_dir: Where to write run files.
+        :param workers: If given, run on a process pool of this many
+            workers, each folding a chunk at a time into partial
+            accumulators that are merged here. key, agg and value must then
+            be picklable (e.g. module-level functions).
+        :param chunksize: The number of items per worker task.
+        :param max_pending: The bound on in-flight worker tasks (defaults
+            to four per worker).
+        :param kwargs: Passed to imap, if not using workers.
+        :return: the Aggregate; iterate over its items() for (key, result)
+            pairs in key order, and close it to delete any run files.
+        """
+        from modpipe.aggregate import Aggregate
+
+        sink = Aggregate(key, agg, value, max_keys, spill_dir)
+
+        if workers is None:
+            self.run(iterable, sink, **kwargs)
+            return sink
+
+        from modpipe import parallel
+        for state in parallel.paggregate(self._worker_spec(), iterable, key,
+                                         agg, value, workers, chunksize,
+                                         max_pending):
+            sink.merge_state(state)
+        return sink
+
+    def partition_fn(self, batch_size=256):
+        """
+        Make a cheap, picklable function of a partition iterator, for use
+        with PySpark's mapPartitions:
+
+            rdd.mapPartitions(pipeline.partition_fn())
+
+        Each executor process rebuilds the pipeline once from the module
+        dot path and reuses it for every partition, streaming records
+        through the bulk path.
+
+        :param batch_size: The group size for batch-aware stages.
+        :return: a PartitionFn.
+        """
+        from modpipe import parallel
+        return parallel.PartitionFn(self._worker_spec(), batch_size)
+
+    def tmap(self, iterable, threads=8, max_pending=None,
+             dead_letters=None):
+        """
+        Run items through the pipeline on a thread pool.
+
+        Best for stages that spend their time blocked on I/O. At most
+        max_pending items are in flight at once, and results come back in
+        input order. Each item runs on its own, so batch-aware stages are
+        called with one item at a time; use pmap or imap to batch them.
+
+        :param iterable: The items to process.
+        :param threads: The number of worker threads.
+        :param max_pending: The bound on in-flight items (defaults to four
+            per thread).
+        :param dead_letters: An optional DeadLetters sink (see imap).
+        :return: a generator over the results.
+        """
+        from modpipe import parallel
 
-            if isinstance(res, Done):
-                break
+        plan = self._plan
+        if dead_letters is None:
+            run = plan.run
+        else:
+            from functools import partial
+            from modpipe.deadletter import attempt
+            run = partial(attempt, plan.run_located)
 
-        if isinstance(res, SkipTo):
-            target_name = res.target_f.__name__
-            msg = "Pipeline ended before encountering {}".format(target_name)
-            raise RuntimeError(msg)
+        results = parallel.tmap(run, iterable, threads, max_pending)
+        return self._flatten(results, dead_letters, plan)
 
-        return res.args
+    def _flatten(self, results, dead_letters, plan=None):
+        # Per-item results from a pool: route failures to dead letters,
+        # with fan-out stages unpack each item's list of outputs, and leave
+        # out dropped items.
+        fan_out = (plan or self._plan).is_fan_out
+        if dead_letters is not None:
+            results = dead_letters.route(results, fan_out)
+        elif fan_out:
+            results = chain_iterables.from_iterable(results)
+        return _without_drops(results)
@@ -0,0 +1,256 @@
+import os
+from collections import deque
+from threading import Lock
+from typing import Callable, Iterable, Iterator, Mapping
+
+# multiprocessing and concurrent.futures are imported where used; they
+# dominate import time and most callers never need them.
+
+# Each worker process holds exactly one pipeline, built by _init_worker.
+_worker_pipe = None
+
+
+def build_from_spec(spec: Mapping):
+    """
+    Rebuild a ModPipe from its worker spec.
+
+    :param spec: The manifest returned by ModPipe.manifest.
+    :return: an instantiated ModPipe with the same retained stages.
+    """
+    from modpipe.modpipe_impl import ModPipe
+    return ModPipe.from_manifest(spec)
+
+
+def _spec_key(spec: Mapping) -> tuple:
+    if 'chain' in spec:
+        return (tuple(_spec_key(c) for c in spec['chain']),
+                tuple(name for name, _ in spec['stages']))
+    return (spec['module'], spec['source_sha1'],
+            tuple(name for name, _ in spec['stages']))
+
+
+# Pipelines built by PartitionFn, one per spec per process.
+_partition_pipes = {}
+_partition_lock = Lock()
+
+
+class PartitionFn:
+    """
+    A picklable callable that runs a partition's iterator through a
+    pipeline, e.g. for PySpark's ``rdd.mapPartitions``.
+
+    Only the worker spec is pickled. The pipeline is rebuilt on first use in
+    each executor process and cached for every later partition.
+    """
+
+    def __init__(self, spec: Mapping, batch_size: int = 256):
+        self.spec = spec
+        self.batch_size = batch_size
+
+    def pipeline(self):
+        """
+        :return: this process's pipeline for the spec, built if necessary.
+        """
+        key = _spec_key(self.spec)
+        pipe = _partition_pipes.get(key)
+        if pipe is None:
+            with _partition_lock:
+                pipe = _partition_pipes.get(key)
+                if pipe is None:
+                    pipe = build_from_spec(self.spec)
+                    _partition_pipes[key] = pipe
+        return pipe
+
+    def __call__(self, iterator: Iterable) -> Iterator:
+        return self.pipeline().imap(iterator, batch_size=self.batch_size)
+
+    def __repr__(self):
+        modules = [c['module'] for c in self.spec.get('chain', [self.spec])]
+        return "PartitionFn({})".format(', '.join(modules))
+
+
+def _init_worker(spec: Mapping):
+    global _worker_pipe
+    _worker_pipe = build_from_spec(spec)
+
+
+def _run_in_worker(item):
+    return _worker_pipe._plan.run((item,))
+
+
+def _attempt_in_worker(item):
+    from modpipe.deadletter import DeadLetter, attempt
+    res = attempt(_worker_pipe._plan.run_located, (item,))
+    return res.picklable() if isinstance(res, DeadLetter) else res
+
+
+def _runs_in_batches(plan) -> bool:
+    # Fan-out results go back an item's list of outputs at a time.
+    return plan.is_batched and not (plan.is_fan_out or plan.is_async)
+
+
+def _run_chunk_in_worker(chunk: list) -> list:
+    plan = _worker_pipe._plan
+    if _runs_in_batches(plan):
+        # Batch stages get the whole chunk at once.
+        return plan.run_batch([(item,) for item in chunk])
+    return [_run_in_worker(item) for item in chunk]
+
+
+def _attempt_chunk_in_worker(chunk: list) -> list:
+    plan = _worker_pipe._plan
+    if _runs_in_batches(plan):
+        try:
+            return plan.run_batch([(item,) for item in chunk])
+        except Exception:
+            # Re-run an item at a time to find the bad records.
+            pass
+    return [_attempt_in_worker(item) for item in chunk]
+
+
+def _imap_chunks(pool, task: Callable, chunks: Iterable, ordered: bool,
+                 max_pending: int, discard: Callable = None) -> Iterator:
+    # Like Pool.imap over chunks, except at most max_pending chunks are
+    # read ahead of the consumer; Pool.imap's feeder thread reads the whole
+    # input as fast as it can. If given, discard is called on each result
+    # left unconsumed when the generator is closed or fails.
+    from queue import Queue
+
+    pending, finished, results = deque(), Queue(), deque()
+
+    def next_results():
+        if ordered:
+            return pending.popleft().get()
+        pending.popleft()
+        ok, res = finished.get()
+        if not ok:
+            raise res
+        return res
+
+    try:
+        for chunk in chunks:
+            if len(pending) >= max_pending:
+                results.extend(next_results())
+                while results:
+                    yield results.popleft()
+            if ordered:
+                pending.append(pool.apply_async(task, (chunk,)))
+            else:
+                # Completions are only collected out of order.
+                pending.append(pool.apply_async(
+                    task, (chunk,),
+                    callback=lambda res: finished.put((True, res)),
+                    error_callback=lambda err: finished.put((False, err))))
+
+        while pending:
+            results.extend(next_results())
+            while results:
+                yield results.popleft()
+    finally:
+        if discard is not None:
+            while pending:
+                try:
+                    results.extend(next_results())
+                except Exception:
+                    pass
+            for res in results:
+                discard(res)
+
+
+def pmap(spec: Mapping, iterable: Iterable, workers: int = None,
+         chunksize: int = 64, ordered: bool = True,
+         keep_going: bool = False, max_pending: int = None) -> Iterator:
+    """
+    Run items through a pipeline on a process pool.
+
+    :param spec: The worker spec of the pipeline.
+    :param iterable: The items to process.
+    :param workers: The number of processes (defaults to the CPU count).
+    :param chunksize: The number of items sent to a worker at once, which
+        is also the group size for batch-aware stages.
+    :param ordered: if True, yield results in input order; otherwise, in
+        completion order.
+    :param keep_going: if True, yield a DeadLetter for each failed item
+        instead of raising.
+    :param max_pending: The bound on in-flight chunks (defaults to four
+        per worker).
+    :return: a generator over the results.
+    """
+    from multiprocessing import Pool
+    from modpipe.streams import chunked
+
+    workers = workers or os.cpu_count() or 1
+    task = _attempt_chunk_in_worker if keep_going else _run_chunk_in_worker
+
+    with Pool(workers, _init_worker, (spec,)) as pool:
+        yield from _imap_chunks(pool, task, chunked(iterable, chunksize),
+                                ordered, max_pending or 4 * workers)
+
+
+def _aggregate_in_worker(task) -> list:
+    from modpipe.aggregate import fold_partial
+    records, key, agg, value = task
+    # A list, like every chunk task's result (see _imap_chunks).
+    return [fold_partial(_worker_pipe.imap(records), key, agg, value)]
+
+
+def paggregate(spec: Mapping, iterable: Iterable, key: Callable, agg,
+               value: Callable = None, workers: int = None,
+               chunksize: int = 1024, max_pending: int = None) -> Iterator:
+    """
+    Run items through a pipeline on a process pool, folding each chunk's
+    outputs into per-key accumulators in the worker.
+
+    :param spec: The worker spec of the pipeline.
+    :param iterable: The items to process.
+    :param key: Maps an output to its key. Must be picklable.
+    :param agg: The Agg for each key's values. Must be picklable.
+    :param value: Maps an output to its value. Must be picklable.
+    :param workers: The number of processes (defaults to the CPU count).
+    :param chunksize: The number of items folded together in a worker.
+    :param max_pending: The bound on in-flight chunks (defaults to four
+        per worker).
+    :return: a generator of maps from key to partial accumulator, one per
+        chunk, in completion order.
+    """
+    from multiprocessing import Pool
+    from modpipe.streams import chunked
+
+    workers = workers or os.cpu_count() or 1
+    tasks = ((chunk, key, agg, value)
+             for chunk in chunked(iterable, chunksize))
+
+    with Pool(workers, _init_worker, (spec,)) as pool:
+        yield from _imap_chunks(pool, _aggregate_in_worker, tasks, False,
+                                max_pending or 4 * workers)
+
+
+def tmap(run: Callable, iterable: Iterable, threads: int = 8,
+         max_pending: int = None) -> Iterator:
+    """
+    Run items through a pipeline on a thread pool.
+
+    :param run: The callable that runs one item's argument tuple.
+    :param iterable: The items to process.
+    :param threads: The number of worker threads.
+    :param max_pending: The bound on in-flight items (defaults to four per
+        thread).
+    :return: a generator over the results, in input order.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    max_pending = max_pending or 4 * threads
+    pending = deque()
+
+    with ThreadPoolExecutor(threads) as executor:
+        try:
+            for item in iterable:
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(run, (item,)))
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
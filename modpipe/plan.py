@@ -0,0 +1,685 @@
+from collections import OrderedDict
+from copy import copy
+from itertools import islice
+from time import perf_counter
+from typing import Mapping, Set
+
+from modpipe.batching import batch_options
+from modpipe.callables import fingerprint_callable, is_async_callable
+from modpipe.fanout import is_fan_out
+from modpipe.results import Result, Done, SkipTo, Drop
+
+
+def target_name(target) -> str:
+    """
+    :param target: A SkipTo target (a pipeline callable or binding name).
+    :return: a human-readable name for the target.
+    """
+    if isinstance(target, str):
+        return target
+    return getattr(target, '__name__', type(target).__name__)
+
+
+class StageError(Exception):
+    """
+    Raised by Plan.run_located when a stage fails, naming the stage. The
+    original exception is the cause.
+    """
+
+    def __init__(self, stage: str, error: BaseException):
+        super(StageError, self).__init__(stage, error)
+        self.stage = stage
+        self.error = error
+
+    def __str__(self):
+        return "Stage {} failed: {!r}".format(self.stage, self.error)
+
+
+class _CountsWindow:
+    """
+    A window onto a run of another plan's per-stage counts, so a sliced plan
+    counts into its parent's.
+    """
+
+    __slots__ = ('counts', 'start', 'stop')
+
+    def __init__(self, counts, start: int, stop: int):
+        self.counts = counts
+        self.start = start
+        self.stop = stop
+
+    def __getitem__(self, i: int) -> int:
+        return self.counts[self.start + i]
+
+    def __setitem__(self, i: int, n: int):
+        self.counts[self.start + i] = n
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __iter__(self):
+        return iter(self.counts[self.start:self.stop])
+
+
+class Plan:
+    """
+    A flat execution plan compiled from a pipeline sequence.
+
+    Arities and SkipTo targets are resolved once at compile time, so running
+    an item does no per-stage dict lookups or Result allocations.
+
+    A plan is never mutated after construction. That makes it safe to run
+    from many threads at once, and lets a ModPipe swap in a new one
+    atomically.
+    """
+
+    def __init__(self, pipeline_seq: Mapping[str, object],
+                 signatures: Mapping[object, object] = None,
+                 skip_targets: Mapping[str, Set[str]] = None,
+                 arities: Mapping[object, int] = None):
+        """
+        :param pipeline_seq: An ordered mapping of bindings to callables.
+        :param signatures: A map from each callable to its signature.
+        :param skip_targets: An optional map from binding to the bindings it
+            statically names as SkipTo targets. Backwards jumps raise a
+            RuntimeError here rather than when an item reaches them.
+        :param arities: A map from each callable to its arity. If given,
+            signatures may be omitted (and are computed only if asked for).
+        """
+        self.pipeline = pipeline_seq
+        self._signatures = signatures
+        if arities is None:
+            arities = {f: len(sig.parameters)
+                       for f, sig in signatures.items()}
+        self.expected_args = arities
+        self.skip_targets = skip_targets or {}
+
+        expected_args = self.expected_args
+        self.names = tuple(pipeline_seq)
+        self.steps = tuple((f, expected_args[f])
+                           for f in pipeline_seq.values())
+
+        self._fingerprints = None
+        self.stage_stats = None
+        self.tracer = None
+        # Items each stage returned Drop for. Copies of the plan (e.g.
+        # memoized or instrumented ones) share the counts.
+        self.drops = [0] * len(self.steps)
+
+        self.awaits = tuple(is_async_callable(f)
+                            for f in pipeline_seq.values())
+        self.is_async = any(self.awaits)
+        if self.is_async:
+            # Shadow run so synchronous entry points fail loudly instead of
+            # passing coroutines along as data.
+            self.run = self._refuse_sync_run
+
+        self.batched = tuple(batch_options(f) for f in pipeline_seq.values())
+        self.is_batched = any(opts is not None for opts in self.batched)
+        if self.is_batched and not self.is_async:
+            # Single items run as batches of one.
+            self.run = self._run_as_batch
+
+        self.fans_out = tuple(is_fan_out(f) for f in pipeline_seq.values())
+        self.is_fan_out = any(self.fans_out)
+        if self.is_fan_out:
+            if self.is_async:
+                msg = "Fan-out stages aren't supported with async stages"
+                raise RuntimeError(msg)
+            # Single items return a list of all their outputs.
+            self.run = self._run_fanned
+
+        jumps = {}
+        for i, (k, f) in enumerate(pipeline_seq.items()):
+            jumps[k] = i
+            jumps.setdefault(f, i)
+        self.jumps = jumps
+
+        for k, targets in self.skip_targets.items():
+            if k not in jumps:
+                continue
+            for target in targets:
+                if target in jumps and jumps[target] <= jumps[k]:
+                    msg = "{} skips backwards to {}"
+                    raise RuntimeError(msg.format(k, target))
+
+    def __len__(self):
+        return len(self.steps)
+
+    @property
+    def signatures(self) -> Mapping[object, object]:
+        if self._signatures is None:
+            from modpipe.helpers import compile_signatures
+            self._signatures = compile_signatures(self.pipeline)
+        return self._signatures
+
+    @property
+    def fingerprints(self):
+        """
+        (binding, code hash) for each stage, computed on first use.
+        """
+        if self._fingerprints is None:
+            self._fingerprints = tuple(
+                (k, fingerprint_callable(f))
+                for k, f in self.pipeline.items())
+        return self._fingerprints
+
+    def bare(self) -> 'Plan':
+        """
+        :return: an equivalent plan without caches or instrumentation.
+        """
+        plan = Plan(self.pipeline, self._signatures, self.skip_targets,
+                    self.expected_args)
+        plan.drops = self.drops
+        return plan
+
+    def without(self, k: str) -> 'Plan':
+        """
+        :param k: The binding of the stage to remove.
+        :return: a new plan without that stage.
+        """
+        f = self.pipeline[k]
+        pipeline = OrderedDict((name, g) for name, g in self.pipeline.items()
+                               if name != k)
+        signatures = None
+        if self._signatures is not None:
+            signatures = {g: sig for g, sig in self._signatures.items()
+                          if g is not f or g in pipeline.values()}
+        arities = {g: n for g, n in self.expected_args.items()
+                   if g is not f or g in pipeline.values()}
+        return Plan(pipeline, signatures, self.skip_targets, arities)
+
+    def sliced(self, start: int, stop: int) -> 'Plan':
+        """
+        :param start: The index of the first stage to keep.
+        :param stop: The index of the stage to stop before.
+        :return: a plan of just those stages. It shares this plan's
+            (possibly memoized) stage callables, stats and drop counts.
+        """
+        names = self.names[start:stop]
+        pipeline = OrderedDict((k, self.pipeline[k]) for k in names)
+        plan = Plan(pipeline, self._signatures, self.skip_targets,
+                    self.expected_args)
+        plan.steps = self.steps[start:stop]
+        plan.drops = _CountsWindow(self.drops, start, stop)
+        if self._fingerprints is not None:
+            plan._fingerprints = self._fingerprints[start:stop]
+        if self.stage_stats is not None:
+            plan = plan.instrumented(self.stage_stats[start:stop])
+        return plan
+
+    def _copy(self) -> 'Plan':
+        # A shallow copy, with run (and any other method __init__ shadowed
+        # with one of this plan's) bound to the copy, so it runs the copy's
+        # steps rather than this plan's.
+        plan = copy(self)
+        for k, v in vars(self).items():
+            if getattr(v, '__self__', None) is self:
+                setattr(plan, k, getattr(plan, v.__func__.__name__))
+        return plan
+
+    def memoized(self, stage_caches) -> 'Plan':
+        """
+        :param stage_caches: A StageCache (or None) for each stage, in order.
+        :return: a copy of this plan whose cached stages consult their
+            caches first.
+        """
+        plan = self._copy()
+        plan.steps = tuple(
+            (f, arity) if cache is None else (cache.wrap(f), arity)
+            for (f, arity), cache in zip(self.steps, stage_caches)
+        )
+        return plan
+
+    def instrumented(self, stage_stats) -> 'Plan':
+        """
+        :param stage_stats: A StageStats for each stage, in order.
+        :return: a copy of this plan whose run records per-stage stats.
+        """
+        plan = self._copy()
+        plan.stage_stats = tuple(stage_stats)
+        if not (plan.is_async or plan.is_batched or plan.is_fan_out):
+            plan.run = plan._run_instrumented
+        return plan
+
+    def traced(self, tracer) -> 'Plan':
+        """
+        :param tracer: A Tracer.
+        :return: a copy of this plan that traces the items the tracer
+            samples. The rest run exactly as they would on this plan.
+        """
+        plan = self._copy()
+        plan.tracer = tracer
+        if not (plan.is_async or plan.is_fan_out):
+            plan._run_untraced = self.run
+            plan.run = plan._run_traced
+            plan._run_located_untraced = self.run_located
+            plan.run_located = plan._run_located_traced
+        return plan
+
+    def jump(self, target, i: int) -> int:
+        """
+        :param target: The SkipTo target.
+        :param i: The index of the stage following the one that skipped.
+        :return: the index of the target stage.
+        """
+        try:
+            j = self.jumps.get(target)
+        except TypeError:  # Unhashable, so it can't be a stage.
+            j = None
+
+        if j is None or j < i:
+            msg = "Pipeline ended before encountering {}"
+            raise RuntimeError(msg.format(target_name(target)))
+
+        return j
+
+    def _settle(self, args, res, i: int):
+        # Interpret stage i's result: the new args and the next index (None
+        # after a Done).
+        if res is None:
+            return args, i + 1
+        elif not isinstance(res, Result):
+            return res, i + 1
+        elif isinstance(res, Done):
+            if res is Drop:
+                self.drops[i] += 1
+            return res.args, None
+        elif isinstance(res, SkipTo):
+            return res.args, self.jump(res.target_f, i + 1)
+
+        return res.args, i + 1
+
+    def advance(self, args, i: int):
+        """
+        Run a single stage.
+
+        :param args: The current arguments.
+        :param i: The index of the stage to run.
+        :return: the new arguments and the index of the next stage to run,
+            which is len(self) past the last stage, or None after a Done.
+        """
+        f, arity = self.steps[i]
+
+        if self.batched[i] is not None:
+            return self._settle(args, self._call_batch(i, [args])[0], i)
+        elif isinstance(args, tuple) and len(args) == arity:
+            res = f(*args)
+        else:
+            res = f(args)
+
+        return self._settle(args, res, i)
+
+    def _call_batch(self, i: int, arg_seq: list) -> list:
+        f, _ = self.steps[i]
+        array, = self.batched[i]
+
+        inputs = [args[0] if isinstance(args, tuple) and len(args) == 1
+                  else args for args in arg_seq]
+        if array:
+            import numpy
+            inputs = numpy.asarray(inputs)
+
+        results = f(inputs)
+
+        if len(results) != len(arg_seq):
+            msg = "Batch stage {} returned {} results for {} items"
+            raise RuntimeError(msg.format(self.names[i], len(results),
+                                          len(arg_seq)))
+
+        return results
+
+    def run_batch(self, arg_seq: list) -> list:
+        """
+        Run a group of items through the plan together.
+
+        Stages run in order. Each stage sees only the items whose next
+        stage it is, so items that finished with Done, or are waiting for a
+        later SkipTo target, are masked out; the survivors are regrouped
+        for every stage. Batch stages get one call per group; the rest get
+        one call per item.
+
+        :param arg_seq: The positional arguments of each item.
+        :return: the final value of each item, in order (or, with fan-out
+            stages, of each output).
+        """
+        states = list(arg_seq)
+        chunks = self.run_span(states, [0] * len(states), 0, len(self.steps))
+        return [args for chunk, _ in chunks for args in chunk]
+
+    def run_span(self, states: list, nexts: list, start: int, end: int,
+                 chunk_size: int = None):
+        """
+        Run a group of items through stages start to end - 1, as in
+        run_batch.
+
+        Until a fan-out stage, the group is updated in place. A fan-out
+        stage replaces each item with its outputs lazily: they're regrouped
+        into chunks of up to chunk_size (by default, the group's size) and
+        each chunk runs through the rest of the span before the next is
+        drawn, so unbounded fan-outs stream.
+
+        :param states: The current arguments of each item.
+        :param nexts: The index of each item's next stage, which is
+            len(self) once it has finished.
+        :param start: The first stage to run.
+        :param end: The stage to stop before.
+        :param chunk_size: The size of the chunks of fan-out outputs.
+        :return: a generator of (states, nexts) chunks, in order. Without
+            fan-outs, that's just the group itself.
+        """
+        n = len(self.steps)
+
+        for i in range(start, end):
+            active = [k for k, j in enumerate(nexts) if j == i]
+            if not active:
+                continue
+
+            if self.fans_out[i]:
+                size = chunk_size or max(len(states), 1)
+                outputs = self._fan_span(states, nexts, i)
+                while True:
+                    chunk = list(islice(outputs, size))
+                    if not chunk:
+                        return
+                    yield from self.run_span([args for args, _ in chunk],
+                                             [j for _, j in chunk],
+                                             i + 1, end, size)
+            elif self.batched[i] is not None:
+                results = self._call_batch(i, [states[k] for k in active])
+                for k, res in zip(active, results):
+                    states[k], j = self._settle(states[k], res, i)
+                    nexts[k] = n if j is None else j
+            else:
+                for k in active:
+                    states[k], j = self.advance(states[k], i)
+                    nexts[k] = n if j is None else j
+
+        yield states, nexts
+
+    def _fan_span(self, states: list, nexts: list, i: int):
+        # The group's items and next stages, with those at fan-out stage i
+        # replaced by their outputs.
+        n = len(self.steps)
+        for args, j in zip(states, nexts):
+            if j != i:
+                yield args, j
+                continue
+            for out, k in self._fan(args, i):
+                yield out, n if k is None else k
+
+    def imap_batched(self, iterable, batch_size: int = 256):
+        """
+        :param iterable: The items to process.
+        :param batch_size: The number of consecutive items grouped together.
+        :return: a generator over the results, in input order.
+        """
+        it, n = iter(iterable), len(self.steps)
+        while True:
+            group = [(item,) for item in islice(it, batch_size)]
+            if not group:
+                return
+            for states, _ in self.run_span(group, [0] * len(group), 0, n,
+                                           batch_size):
+                yield from states
+
+    def _fan(self, args, i: int):
+        # Settle each value fan-out stage i yields for args.
+        f, arity = self.steps[i]
+        if isinstance(args, tuple) and len(args) == arity:
+            outputs = f(*args)
+        else:
+            outputs = f(args)
+
+        for res in outputs:
+            yield self._settle(args, res, i)
+
+    def iter_outputs(self, args: tuple, i: int = 0, located: bool = False):
+        """
+        Lazily run one item through a plan with fan-out stages.
+
+        :param args: The item's current arguments.
+        :param i: The index of the stage to run next.
+        :param located: if True, re-raise stage failures as StageErrors.
+        :return: a generator over the item's final outputs.
+        """
+        n = len(self.steps)
+
+        try:
+            while i is not None and i < n:
+                if self.fans_out[i]:
+                    for out, j in self._fan(args, i):
+                        yield from self.iter_outputs(out, j, located)
+                    return
+                args, i = self.advance(args, i)
+        except StageError:
+            raise
+        except Exception as e:
+            if not located:
+                raise
+            raise StageError(self.names[i], e) from e
+
+        yield args
+
+    def _run_fanned(self, args: tuple) -> list:
+        return [out for out in self.iter_outputs(args) if out is not Drop]
+
+    def _run_as_batch(self, args: tuple):
+        return self.run_batch([args])[0]
+
+    def _refuse_sync_run(self, args: tuple):
+        msg = "Pipeline has async stages; use acall or amap"
+        raise RuntimeError(msg)
+
+    def run(self, args: tuple):
+        """
+        Run one item through the plan.
+
+        :param args: The positional arguments for the first stage.
+        :return: the final value, as ModPipe.__call__ returns it.
+        """
+        steps, n, i = self.steps, len(self.steps), 0
+
+        while i < n:
+            f, arity = steps[i]
+            i += 1
+
+            if isinstance(args, tuple) and len(args) == arity:
+                res = f(*args)
+            else:
+                res = f(args)
+
+            if res is None:
+                continue
+            elif not isinstance(res, Result):
+                args = res
+                continue
+
+            args = res.args
+            if isinstance(res, Done):
+                if res is Drop:
+                    self.drops[i - 1] += 1
+                break
+            elif isinstance(res, SkipTo):
+                i = self.jump(res.target_f, i)
+
+        return args
+
+    def run_located(self, args: tuple):
+        """
+        Run one item through the plan like run, but re-raise any exception
+        from a stage as a StageError naming that stage.
+
+        :param args: The positional arguments for the first stage.
+        :return: the final value, as ModPipe.__call__ returns it.
+        """
+        if self.is_async:
+            self._refuse_sync_run(args)
+        elif self.is_fan_out:
+            return list(self.iter_outputs(args, located=True))
+        elif self.is_batched or self.stage_stats is not None:
+            return self._run_located_stepwise(args)
+
+        steps, n, i = self.steps, len(self.steps), 0
+
+        try:
+            while i < n:
+                f, arity = steps[i]
+                i += 1
+
+                if isinstance(args, tuple) and len(args) == arity:
+                    res = f(*args)
+                else:
+                    res = f(args)
+
+                if res is None:
+                    continue
+                elif not isinstance(res, Result):
+                    args = res
+                    continue
+
+                args = res.args
+                if isinstance(res, Done):
+                    if res is Drop:
+                        self.drops[i - 1] += 1
+                    break
+                elif isinstance(res, SkipTo):
+                    i = self.jump(res.target_f, i)
+        except Exception as e:
+            raise StageError(self.names[i - 1], e) from e
+
+        return args
+
+    def _run_located_stepwise(self, args: tuple):
+        # Slower, but handles batch stages (as batches of one) and records
+        # stats if the plan is instrumented.
+        stats, n, i = self.stage_stats, len(self.steps), 0
+
+        while i is not None and i < n:
+            t0 = perf_counter()
+            try:
+                args, j = self.advance(args, i)
+            except Exception as e:
+                if stats is not None:
+                    stats[i].errors += 1
+                raise StageError(self.names[i], e) from e
+            finally:
+                if stats is not None:
+                    stats[i].record(perf_counter() - t0)
+
+            if stats is not None:
+                if j is None and args is Drop:
+                    stats[i].dropped += 1
+                elif j is None:
+                    stats[i].done += 1
+                elif j != i + 1:
+                    stats[i].skipped += 1
+            i = j
+
+        return args
+
+    def _run_traced(self, args: tuple):
+        if not self.tracer.sample(args):
+            return self._run_untraced(args)
+        return self._trace(args, False)
+
+    def _run_located_traced(self, args: tuple):
+        if not self.tracer.sample(args):
+            return self._run_located_untraced(args)
+        return self._trace(args, True)
+
+    def _trace(self, args: tuple, located: bool):
+        # Run a sampled item stage by stage, recording each step. If
+        # located, failures are re-raised as StageErrors, as in run_located.
+        trace = self.tracer.begin(args).steps
+        steps, stats, names = self.steps, self.stage_stats, self.names
+        n, i = len(steps), 0
+
+        while i is not None and i < n:
+            f, arity = steps[i]
+            t0 = perf_counter()
+            try:
+                if self.batched[i] is not None:
+                    res = self._call_batch(i, [args])[0]
+                elif isinstance(args, tuple) and len(args) == arity:
+                    res = f(*args)
+                else:
+                    res = f(args)
+                new_args, j = self._settle(args, res, i)
+            except Exception as e:
+                trace.append((names[i], args, e, 'error'))
+                if stats is not None:
+                    stats[i].errors += 1
+                if located:
+                    raise StageError(names[i], e) from e
+                raise
+            finally:
+                if stats is not None:
+                    stats[i].record(perf_counter() - t0)
+
+            if res is None:
+                exit = 'none'
+            elif res is Drop:
+                exit = 'drop'
+            elif j is None:
+                exit = 'done'
+            elif isinstance(res, SkipTo):
+                exit = 'skip'
+            else:
+                exit = 'value'
+            trace.append((names[i], args, new_args, exit))
+
+            if stats is not None:
+                if exit == 'none':
+                    stats[i].nones += 1
+                elif exit == 'done':
+                    stats[i].done += 1
+                elif exit == 'drop':
+                    stats[i].dropped += 1
+                elif exit == 'skip':
+                    stats[i].skipped += 1
+
+            args, i = new_args, j
+
+        return args
+
+    def _run_instrumented(self, args: tuple):
+        steps, stats, n, i = self.steps, self.stage_stats, len(self.steps), 0
+
+        while i < n:
+            f, arity = steps[i]
+            st = stats[i]
+            i += 1
+
+            t0 = perf_counter()
+            try:
+                if isinstance(args, tuple) and len(args) == arity:
+                    res = f(*args)
+                else:
+                    res = f(args)
+            except Exception:
+                st.errors += 1
+                raise
+            finally:
+                st.record(perf_counter() - t0)
+
+            if res is None:
+                st.nones += 1
+                continue
+            elif not isinstance(res, Result):
+                args = res
+                continue
+
+            args = res.args
+            if res is Drop:
+                st.dropped += 1
+                self.drops[i - 1] += 1
+                break
+            elif isinstance(res, Done):
+                st.done += 1
+                break
+            elif isinstance(res, SkipTo):
+                st.skipped += 1
+                i = self.jump(res.target_f, i)
+
+        return args
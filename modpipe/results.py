@@ -43,3 +43,27 @@ class SkipTo(Result):
             return self
         else:
             return Result.apply_to(self, f, arity)
+
+
+class _Dropped(Done):
+    """
+    The type of Drop. There is only the one instance.
+    """
+
+    def __init__(self):
+        # A dropped item's final value is Drop itself, so runs need no
+        # special case to return it.
+        self.args = self
+
+    def __repr__(self):
+        return 'Drop'
+
+    def __reduce__(self):
+        # Unpickle (e.g. from a pmap worker) to the same singleton.
+        return 'Drop'
+
+
+#: Return Drop from a stage to discard the item: bulk modes emit nothing
+#: for it. Like a Done, it ends the item's run; calling the pipeline on the
+#: item directly returns Drop.
+Drop = _Dropped()
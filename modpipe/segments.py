@@ -0,0 +1,188 @@
+"""
+Pipeline-parallel execution: the plan is split into contiguous segments of
+stages, each run by its own thread or process, connected by bounded queues.
+
+Items travel in chunks. Every chunk passes through every segment in order,
+so output order is preserved; items that finished early (with Done) or are
+waiting for a SkipTo target further on are simply passed along untouched.
+"""
+import pickle
+import queue
+import threading
+from typing import Iterable, Iterator, List, Mapping, Sequence, Tuple, Union
+
+from modpipe.plan import Plan
+
+_POLL_S = 0.1
+
+
+class _Failure:
+
+    def __init__(self, error: BaseException):
+        try:
+            pickle.dumps(error)
+        except Exception:
+            error = RuntimeError(repr(error))
+        self.error = error
+
+
+def resolve_segments(names: Sequence[str],
+                     segments: Union[int, Sequence[str]] = None
+                     ) -> List[Tuple[int, int]]:
+    """
+    :param names: The plan's stage bindings, in order.
+    :param segments: None for a segment per stage, a number of (roughly
+        equal) segments, or the bindings at which new segments start.
+    :return: a list of (start, end) stage index ranges covering the plan.
+    """
+    n = len(names)
+
+    if segments is None:
+        starts = list(range(n))
+    elif isinstance(segments, int):
+        if segments < 1:
+            raise ValueError("Need at least one segment")
+        k = min(segments, n) or 1
+        starts = sorted({(n * s) // k for s in range(k)})
+    else:
+        index = {name: i for i, name in enumerate(names)}
+        missing = [name for name in segments if name not in index]
+        if missing:
+            raise KeyError("No stages named {}".format(missing))
+        starts = sorted({0} | {index[name] for name in segments})
+
+    starts = starts or [0]
+    return list(zip(starts, starts[1:] + [n]))
+
+
+def _get(q, stop):
+    while True:
+        try:
+            return q.get(timeout=_POLL_S)
+        except queue.Empty:
+            if stop.is_set():
+                return None
+
+
+def _put(q, msg, stop) -> bool:
+    while True:
+        try:
+            q.put(msg, timeout=_POLL_S)
+            return True
+        except queue.Full:
+            if stop.is_set():
+                return False
+
+
+def _pump(plan: Plan, start: int, end: int, inq, outq, stop):
+    # Run chunks through stages [start, end) until the end of the stream, a
+    # failure upstream or here, or the consumer stops. A fan-out stage may
+    # turn one chunk into several, sent on as they're made.
+    while not stop.is_set():
+        msg = _get(inq, stop)
+        if msg is None or isinstance(msg, _Failure):
+            _put(outq, msg, stop)
+            return
+
+        states, nexts = msg
+        try:
+            for chunk in plan.run_span(states, nexts, start, end, len(states)):
+                if not _put(outq, chunk, stop):
+                    return
+        except Exception as e:
+            _put(outq, _Failure(e), stop)
+            return
+
+
+def _pump_in_process(spec: Mapping, start: int, end: int, inq, outq, stop):
+    from modpipe.parallel import build_from_spec
+
+    try:
+        plan = build_from_spec(spec)._plan
+    except Exception as e:
+        _put(outq, _Failure(e), stop)
+        return
+
+    _pump(plan, start, end, inq, outq, stop)
+
+
+def _feed(iterable: Iterable, chunksize: int, outq, stop):
+    from modpipe.streams import chunked
+
+    try:
+        for chunk in chunked(iterable, chunksize):
+            msg = ([(item,) for item in chunk], [0] * len(chunk))
+            if not _put(outq, msg, stop):
+                return
+        msg = None
+    except Exception as e:
+        msg = _Failure(e)
+    _put(outq, msg, stop)
+
+
+def smap(plan: Plan, iterable: Iterable,
+         segments: Union[int, Sequence[str]] = None, chunksize: int = 64,
+         queue_size: int = 4, spec: Mapping = None) -> Iterator:
+    """
+    Run items through a plan with each segment of stages working on a
+    different chunk of items at the same time.
+
+    :param plan: The compiled plan.
+    :param iterable: The items to process.
+    :param segments: How to split the stages (see resolve_segments).
+    :param chunksize: The number of items handed between segments at once.
+    :param queue_size: The number of chunks buffered between segments.
+        A full queue blocks the segment feeding it.
+    :param spec: If given, the worker spec of the pipeline, and segments
+        run in processes (each rebuilding the pipeline from it) rather
+        than threads.
+    :return: a generator over the results, in input order.
+    """
+    if plan.is_async:
+        raise RuntimeError("Pipeline has async stages; use acall or amap")
+
+    bounds = resolve_segments(plan.names, segments)
+
+    if spec is None:
+        make_queue, stop = queue.Queue, threading.Event()
+    else:
+        import multiprocessing
+        make_queue, stop = multiprocessing.Queue, multiprocessing.Event()
+
+    queues = [make_queue(queue_size) for _ in range(len(bounds) + 1)]
+    workers = []
+    for k, (start, end) in enumerate(bounds):
+        links = (queues[k], queues[k + 1], stop)
+        if spec is None:
+            worker = threading.Thread(
+                target=_pump, args=(plan, start, end) + links,
+                name='modpipe-segment-{}'.format(k), daemon=True)
+        else:
+            worker = multiprocessing.Process(
+                target=_pump_in_process, args=(spec, start, end) + links,
+                daemon=True)
+        workers.append(worker)
+
+    feeder = threading.Thread(target=_feed,
+                              args=(iterable, chunksize, queues[0], stop),
+                              name='modpipe-segment-feed', daemon=True)
+
+    for worker in workers:
+        worker.start()
+    feeder.start()
+
+    try:
+        while True:
+            msg = _get(queues[-1], stop)
+            if msg is None:
+                return
+            elif isinstance(msg, _Failure):
+                raise msg.error
+            yield from msg[0]
+    finally:
+        stop.set()
+        feeder.join(1)
+        for worker in workers:
+            worker.join(1)
+            if spec is not None and worker.is_alive():
+                worker.terminate()
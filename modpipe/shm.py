@@ -0,0 +1,328 @@
+"""
+Shared-memory transport for process pools.
+
+Large bytes, bytearray, memoryview and NumPy array payloads are copied once
+into shared memory and only a small descriptor (segment name, offset, size,
+dtype and shape) is pickled, rather than the payload being pickled, piped
+and unpickled.
+
+Inputs go through a ring buffer owned by the parent, whose spans are freed
+as results come back. Large results come back in a one-off segment that the
+parent copies out of and unlinks. Requires Python 3.8+.
+"""
+import threading
+from collections import deque
+
+#: Payloads smaller than this are pickled as usual.
+MIN_SHARED_BYTES = 1 << 16
+
+
+def _is_ndarray(value) -> bool:
+    # Checked by name so NumPy is never imported just to look.
+    cls = type(value)
+    return cls.__name__ == 'ndarray' and cls.__module__ == 'numpy'
+
+
+def _payload(value):
+    # The kind, raw bytes view, dtype and shape of a shareable value, or
+    # None if it should just be pickled.
+    if isinstance(value, (bytes, bytearray)):
+        kind, view, dtype, shape = type(value).__name__, memoryview(value), \
+            None, None
+    elif isinstance(value, memoryview):
+        if not value.c_contiguous:
+            return None
+        kind, view, dtype, shape = 'memoryview', value.cast('B'), None, None
+    elif _is_ndarray(value):
+        if not value.flags.c_contiguous or value.dtype.hasobject:
+            return None
+        kind, view, dtype, shape = 'ndarray', memoryview(value).cast('B'), \
+            value.dtype.str, value.shape
+    else:
+        return None
+
+    if view.nbytes < MIN_SHARED_BYTES:
+        return None
+    return kind, view, dtype, shape
+
+
+class SharedRef:
+    """
+    A descriptor of a payload in shared memory.
+    """
+
+    __slots__ = ('kind', 'name', 'offset', 'nbytes', 'dtype', 'shape')
+
+    def __init__(self, kind, name, offset, nbytes, dtype=None, shape=None):
+        self.kind = kind
+        self.name = name
+        self.offset = offset
+        self.nbytes = nbytes
+        self.dtype = dtype
+        self.shape = shape
+
+    def __getstate__(self):
+        return (self.kind, self.name, self.offset, self.nbytes, self.dtype,
+                self.shape)
+
+    def __setstate__(self, state):
+        (self.kind, self.name, self.offset, self.nbytes, self.dtype,
+         self.shape) = state
+
+    def load(self, buf, copy: bool):
+        """
+        :param buf: The segment's buffer.
+        :param copy: if True, copy the payload out; otherwise bytes-likes
+            and arrays view the segment directly (bytes are always copied).
+        :return: the payload, as its original type.
+        """
+        view = buf[self.offset:self.offset + self.nbytes]
+
+        if self.kind == 'ndarray':
+            import numpy
+            arr = numpy.frombuffer(view, dtype=self.dtype).reshape(self.shape)
+            return arr.copy() if copy else arr
+        elif self.kind == 'bytes':
+            return bytes(view)
+        elif self.kind == 'bytearray':
+            return bytearray(view)
+        return memoryview(bytes(view)) if copy else view
+
+
+class ShmRing:
+    """
+    A ring buffer allocator over one shared-memory segment.
+
+    Spans are allocated in order and may be released in any order; space is
+    reclaimed from the oldest live span. Allocation never blocks: if there
+    isn't room, it returns None and the caller falls back to pickling.
+    """
+
+    def __init__(self, size: int):
+        from multiprocessing.shared_memory import SharedMemory
+
+        self.shm = SharedMemory(create=True, size=size)
+        self.size = size
+        self.overflows = 0
+
+        self._head = 0
+        self._spans = deque()  # [offset, nbytes, released], oldest first
+        self._live = {}
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def alloc(self, nbytes: int):
+        """
+        :param nbytes: The span's size.
+        :return: the span's offset, or None if there's no room.
+        """
+        with self._lock:
+            spans = self._spans
+            if nbytes <= 0:
+                offset = None
+            elif not spans:
+                self._head = 0
+                offset = 0 if nbytes <= self.size else None
+            else:
+                tail = spans[0][0]
+                # Live spans run from the tail to the head, unless the
+                # newest span has wrapped back before the oldest one; only
+                # then does the free space end at the tail (so a ring
+                # filled exactly to the tail isn't mistaken for empty).
+                if spans[-1][0] < tail:
+                    limit = tail
+                else:
+                    limit = self.size
+
+                if self._head + nbytes <= limit:
+                    offset = self._head
+                elif limit == self.size and nbytes <= tail:
+                    offset = 0
+                else:
+                    offset = None
+
+            if offset is None:
+                self.overflows += 1
+                return None
+
+            span = [offset, nbytes, False]
+            self._spans.append(span)
+            self._live[offset] = span
+            self._head = offset + nbytes
+            return offset
+
+    def release(self, offset: int):
+        """
+        :param offset: The offset of a span from alloc.
+        """
+        with self._lock:
+            self._live.pop(offset)[2] = True
+            spans = self._spans
+            while spans and spans[0][2]:
+                spans.popleft()
+
+    def put(self, value):
+        """
+        :param value: Any value.
+        :return: a SharedRef to a copy of it in the ring, or the value
+            itself if it isn't shareable or doesn't fit.
+        """
+        payload = _payload(value)
+        if payload is None:
+            return value
+
+        kind, view, dtype, shape = payload
+        offset = self.alloc(view.nbytes)
+        if offset is None:
+            return value
+
+        self.shm.buf[offset:offset + view.nbytes] = view
+        return SharedRef(kind, self.name, offset, view.nbytes, dtype, shape)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+# Segments attached by this (worker) process, by name.
+_attached = {}
+
+
+def _attach(name: str):
+    from multiprocessing.shared_memory import SharedMemory
+
+    shm = _attached.get(name)
+    if shm is None:
+        shm = _attached[name] = SharedMemory(name=name)
+    return shm
+
+
+def share_result(value):
+    """
+    :param value: A result, in a worker.
+    :return: a SharedRef to a copy of it in a new segment, or the value
+        itself if it isn't shareable.
+    """
+    payload = _payload(value)
+    if payload is None:
+        return value
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    kind, view, dtype, shape = payload
+    shm = SharedMemory(create=True, size=view.nbytes)
+    shm.buf[:view.nbytes] = view
+    ref = SharedRef(kind, shm.name, 0, view.nbytes, dtype, shape)
+    shm.close()
+    return ref
+
+
+def take_result(value):
+    """
+    :param value: A result, in the parent.
+    :return: the result, copied out of (and unlinking) its segment if it
+        was shared.
+    """
+    if not isinstance(value, SharedRef):
+        return value
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    shm = SharedMemory(name=value.name)
+    try:
+        return value.load(shm.buf, copy=True)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def discard_result(value):
+    """
+    Unlink a result's segment, if it was shared, without reading it.
+
+    :param value: A result.
+    """
+    if isinstance(value, SharedRef):
+        from multiprocessing.shared_memory import SharedMemory
+
+        shm = SharedMemory(name=value.name)
+        shm.close()
+        shm.unlink()
+
+
+def _load_shared(task):
+    offset, item = None, task
+    if isinstance(task, SharedRef):
+        # The ring span stays ours until this result is back, so the stage
+        # can view it in place.
+        offset, item = task.offset, task.load(_attach(task.name).buf, False)
+    return offset, item
+
+
+def _run_shared_chunk(run_chunk, chunk: list) -> list:
+    offsets, items = zip(*map(_load_shared, chunk)) if chunk else ((), ())
+    results = []
+    try:
+        for res in run_chunk(list(items)):
+            results.append(share_result(res))
+    except BaseException:
+        # The parent never sees this chunk's results, so it can't unlink
+        # them.
+        for res in results:
+            discard_result(res)
+        raise
+    return list(zip(offsets, results))
+
+
+def _discard_pair(pair):
+    discard_result(pair[1])
+
+
+def pmap_shared(spec, iterable, workers: int = None, chunksize: int = 64,
+                ordered: bool = True, keep_going: bool = False,
+                ring_bytes: int = 1 << 28, max_pending: int = None):
+    """
+    pmap (see modpipe.parallel.pmap) with large payloads moved through
+    shared memory.
+
+    :param ring_bytes: The size of the input ring buffer. Inputs that don't
+        fit while it's full of in-flight items are pickled instead.
+    :param max_pending: The bound on in-flight chunks (defaults to four
+        per worker).
+    :return: a generator over the results. Shared results left unconsumed
+        when it's closed are unlinked.
+    """
+    import os
+    from functools import partial
+    from multiprocessing import Pool
+    from modpipe import parallel
+    from modpipe.streams import chunked
+
+    workers = workers or os.cpu_count() or 1
+    if keep_going:
+        run_chunk = parallel._attempt_chunk_in_worker
+    else:
+        run_chunk = parallel._run_chunk_in_worker
+    task = partial(_run_shared_chunk, run_chunk)
+
+    ring = ShmRing(ring_bytes)
+    chunks = chunked(map(ring.put, iterable), chunksize)
+
+    try:
+        with Pool(workers, parallel._init_worker, (spec,)) as pool:
+            pairs = parallel._imap_chunks(pool, task, chunks, ordered,
+                                          max_pending or 4 * workers,
+                                          _discard_pair)
+            try:
+                for offset, res in pairs:
+                    if offset is not None:
+                        ring.release(offset)
+                    yield take_result(res)
+            finally:
+                # Unlink unconsumed results while the pool's still up.
+                pairs.close()
+    finally:
+        ring.close()
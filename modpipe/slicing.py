@@ -0,0 +1,149 @@
+from collections import OrderedDict
+
+from modpipe.modpipe_impl import ModPipe
+from modpipe.plan import Plan
+
+
+def _stage_index(plan: Plan, k):
+    if k is None or isinstance(k, int):
+        return k
+    try:
+        return plan.names.index(k)
+    except ValueError:
+        raise KeyError(k) from None
+
+
+class PipeSlice(ModPipe):
+    """
+    A view of a contiguous run of another pipeline's stages.
+
+    The view runs the same compiled (and memoized or instrumented) stages
+    as its parent, and follows it across reloads. Done ends the slice, and
+    a SkipTo must target a stage within it. Stats, drop counts and tracing
+    are shared with the parent, and toggling stats or tracing on the view
+    toggles the parent.
+    """
+
+    def __init__(self, parent: ModPipe, start=None, stop=None):
+        """
+        :param parent: The pipeline to view.
+        :param start: The binding (or index) of the first stage, or None
+            for the first.
+        :param stop: The binding (or index) of the stage to stop before, or
+            None for the end.
+        """
+        self._parent = parent
+        self._start = start
+        self._stop = stop
+
+        # Resolve the bounds now, so bad names fail here.
+        parent_plan = parent._plan
+        self._cache = (parent_plan, self._slice_of(parent_plan))
+
+    def _slice_of(self, parent_plan: Plan) -> Plan:
+        bounds = slice(_stage_index(parent_plan, self._start),
+                       _stage_index(parent_plan, self._stop))
+        start, stop, _ = bounds.indices(len(parent_plan))
+        if start >= stop:
+            msg = "Empty pipeline slice from {!r} to {!r}"
+            raise ValueError(msg.format(self._start, self._stop))
+
+        plan = parent_plan.sliced(start, stop)
+        if parent_plan.tracer is not None:
+            plan = plan.traced(parent_plan.tracer)
+        return plan
+
+    @property
+    def _plan(self) -> Plan:
+        parent_plan = self._parent._plan
+        cached_for, plan = self._cache
+        if cached_for is not parent_plan:
+            plan = self._slice_of(parent_plan)
+            self._cache = (parent_plan, plan)
+        return plan
+
+    @property
+    def parent(self) -> ModPipe:
+        return self._parent
+
+    @property
+    def module_name(self):
+        return self._parent.module_name
+
+    @property
+    def abs_module_path(self):
+        return self._parent.abs_module_path
+
+    @property
+    def _lock(self):
+        return self._parent._lock
+
+    def reload(self, force=False, validate=False):
+        """
+        Reload the parent pipeline (see ModPipe.reload).
+        """
+        self._parent.reload(force, validate)
+
+    def _source_paths(self) -> list:
+        return self._parent._source_paths()
+
+    def _install(self, plan: Plan):
+        msg = "Configure caching, stats and tracing on the parent pipeline"
+        raise TypeError(msg)
+
+    def __delitem__(self, k):
+        raise TypeError("Pipeline slices are read-only views")
+
+    def manifest(self) -> dict:
+        """
+        :return: the parent's manifest, keeping only this slice's stages.
+        """
+        manifest = self._parent.manifest()
+        names = set(self._plan.names)
+        manifest['stages'] = [[name, arity] for name, arity
+                              in manifest['stages'] if name in names]
+        return manifest
+
+    def enable_stats(self):
+        self._parent.enable_stats()
+
+    def disable_stats(self):
+        self._parent.disable_stats()
+
+    def reset_stats(self):
+        self._parent.reset_stats()
+
+    def stats(self):
+        """
+        :return: the parent's stats for this slice's stages.
+        """
+        stats = self._parent.stats()
+        return OrderedDict((k, stats[k]) for k in self._plan.names
+                           if k in stats)
+
+    def cache_info(self):
+        return self._parent.cache_info()
+
+    def clear_caches(self):
+        self._parent.clear_caches()
+
+    def enable_tracing(self, rate=0.01, predicate=None, capacity=1000):
+        return self._parent.enable_tracing(rate, predicate, capacity)
+
+    def disable_tracing(self):
+        self._parent.disable_tracing()
+
+    def traces(self):
+        return self._parent.traces()
+
+    def __getstate__(self):
+        return {'_parent': self._parent, '_start': self._start,
+                '_stop': self._stop}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cache = (None, None)
+
+    def __repr__(self):
+        return "{!r}[{!r}:{!r}]".format(self._parent, self._start,
+                                        self._stop)
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import sys
+from types import ModuleType
+from typing import Dict, List, Tuple
+
+# (path, mtime_ns, size, sha1 of contents)
+FileFingerprint = Tuple[str, int, int, str]
+
+_non_local_dirs = None
+
+_MODPIPE_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+def fingerprint_file(path: str,
+                     previous: FileFingerprint = None) -> FileFingerprint:
+    """
+    :param path: The file to fingerprint.
+    :param previous: A prior fingerprint of the same file. If its mtime and
+        size still match, the file isn't re-read.
+    :return: the file's fingerprint.
+    """
+    st = os.stat(path)
+    if previous is not None and previous[1:3] == (st.st_mtime_ns, st.st_size):
+        return previous
+
+    with open(path, 'rb') as fp:
+        digest = hashlib.sha1(fp.read()).hexdigest()
+
+    return path, st.st_mtime_ns, st.st_size, digest
+
+
+def _source_path(module: ModuleType):
+    path = getattr(module, '__file__', None)
+    if path is None:
+        return None
+    if path.endswith(('.pyc', '.pyo')):
+        path = path[:-1]
+    return path if os.path.isfile(path) else None
+
+
+def discard_bytecode(module: ModuleType):
+    """
+    Remove a module's cached bytecode, so that the next import or reload
+    compiles its current source.
+
+    The import system trusts a .pyc whose recorded source mtime (in whole
+    seconds) and size match, so it misses an edit of the same size made
+    within a second of the last compile.
+
+    :param module: A loaded module
+    """
+    cached = getattr(module, '__cached__', None)
+    if cached and _source_path(module) is not None:
+        try:
+            os.remove(cached)
+        except OSError:
+            pass
+
+
+def _get_non_local_dirs():
+    global _non_local_dirs
+    if _non_local_dirs is None:
+        import sysconfig
+        paths = sysconfig.get_paths()
+        _non_local_dirs = tuple(
+            os.path.realpath(paths[k])
+            for k in ('stdlib', 'platstdlib', 'purelib', 'platlib'))
+    return _non_local_dirs
+
+
+def is_local_module(module: ModuleType) -> bool:
+    """
+    :param module: A loaded module
+    :return: true if the module is neither part of the standard library, an
+        installed package, nor modpipe itself.
+    """
+    path = _source_path(module)
+    if path is None:
+        return False
+
+    path = os.path.realpath(path)
+    if path.startswith(_MODPIPE_DIR + os.sep):
+        return False
+    return not any(path.startswith(d + os.sep) for d in _get_non_local_dirs())
+
+
+def iter_local_imports(module: ModuleType):
+    """
+    :param module: A loaded module
+    :return: a generator of the distinct local modules that the module
+        imports, either directly or via ``from ... import ...``.
+    """
+    from inspect import getmodule
+
+    seen = {module.__name__}
+
+    for obj in list(vars(module).values()):
+        dep = obj if isinstance(obj, ModuleType) else getmodule(obj)
+        if dep is None or dep.__name__ in seen:
+            continue
+        seen.add(dep.__name__)
+        if is_local_module(dep):
+            yield dep
+
+
+def fingerprint_sources(module: ModuleType, with_imports: bool = False
+                        ) -> Dict[str, FileFingerprint]:
+    """
+    :param module: A loaded module
+    :param with_imports: if True, also fingerprint the local modules it
+        imports.
+    :return: a map from module name to the fingerprint of its source file.
+    """
+    modules = [module]
+    if with_imports:
+        modules.extend(iter_local_imports(module))
+
+    fingerprints = {}
+    for m in modules:
+        path = _source_path(m)
+        if path is not None:
+            fingerprints[m.__name__] = fingerprint_file(path)
+
+    return fingerprints
+
+
+def changed_sources(fingerprints: Dict[str, FileFingerprint]) -> List[str]:
+    """
+    :param fingerprints: The result of a prior fingerprint_sources.
+    :return: the names of the modules whose source changed (or vanished)
+        since, in the order given.
+    """
+    changed = []
+
+    for name, previous in fingerprints.items():
+        try:
+            current = fingerprint_file(previous[0], previous)
+        except OSError:
+            changed.append(name)
+            continue
+
+        if current[3] != previous[3] or name not in sys.modules:
+            changed.append(name)
+        elif current is not previous:
+            # Touched but unchanged; remember the new stat so the next
+            # check is stat-only again.
+            fingerprints[name] = current
+
+    return changed
@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from typing import Mapping
+
+
+def _bucket(ns: int) -> int:
+    # Log-linear buckets: four sub-buckets per power of two, so any
+    # reported latency is within 12.5% of the true value.
+    b = ns.bit_length()
+    if b <= 3:
+        return ns
+    return (b << 2) | ((ns >> (b - 3)) & 3)
+
+
+def _bucket_value(key: int) -> float:
+    if key < 16:
+        return float(key)
+    b, sub = key >> 2, key & 3
+    lower = (4 | sub) << (b - 3)
+    return lower + (1 << (b - 3)) / 2
+
+
+class StageStats:
+    """
+    Counters and a latency histogram for one pipeline stage.
+
+    Updates aren't locked, so counts gathered under tmap are approximate.
+    """
+
+    __slots__ = ('calls', 'errors', 'nones', 'done', 'skipped', 'dropped',
+                 'total', 'histogram')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.errors = 0
+        self.nones = 0
+        self.done = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.total = 0.0
+        self.histogram = {}
+
+    def record(self, dt: float):
+        """
+        :param dt: The seconds one call took.
+        """
+        self.calls += 1
+        self.total += dt
+        key = _bucket(int(dt * 1e9))
+        self.histogram[key] = self.histogram.get(key, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        """
+        :param q: The percentile, in [0, 100].
+        :return: the approximate latency in seconds at that percentile.
+        """
+        n = sum(self.histogram.values())
+        if n == 0:
+            return 0.0
+
+        rank, seen = q / 100.0 * n, 0
+        for key in sorted(self.histogram):
+            seen += self.histogram[key]
+            if seen >= rank:
+                break
+
+        return _bucket_value(key) / 1e9
+
+    def summary(self) -> Mapping[str, float]:
+        return OrderedDict([
+            ('calls', self.calls),
+            ('errors', self.errors),
+            ('nones', self.nones),
+            ('done', self.done),
+            ('skipped', self.skipped),
+            ('dropped', self.dropped),
+            ('total_s', self.total),
+            ('mean_s', self.total / self.calls if self.calls else 0.0),
+            ('p50_s', self.percentile(50)),
+            ('p90_s', self.percentile(90)),
+            ('p99_s', self.percentile(99)),
+        ])
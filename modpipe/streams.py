@@ -0,0 +1,213 @@
+"""
+Streaming sources and buffered sinks for newline-delimited records.
+
+Paths ending in ``.gz`` are read and written with gzip.
+"""
+import csv
+import gzip
+import json
+import mmap
+import threading
+from collections import deque
+from itertools import islice
+from typing import Iterable, Iterator, Sequence
+
+BUFFER_SIZE = 1 << 20
+
+
+def _open_text(path: str, mode: str, encoding: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding=encoding, newline='')
+    return open(path, mode, encoding=encoding, newline='',
+                buffering=BUFFER_SIZE)
+
+
+def read_lines(path: str, encoding: str = 'utf-8',
+               use_mmap: bool = False) -> Iterator[str]:
+    """
+    :param path: The file to read.
+    :param encoding: The text encoding.
+    :param use_mmap: if True (and the file isn't gzipped), read through a
+        memory map rather than buffered reads.
+    :return: a generator of lines, without trailing newlines.
+    """
+    if use_mmap and not path.endswith('.gz'):
+        with open(path, 'rb') as fp:
+            try:
+                mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty files can't be mapped.
+                return
+            with mm:
+                for line in iter(mm.readline, b''):
+                    yield line.decode(encoding).rstrip('\r\n')
+        return
+
+    with _open_text(path, 'r', encoding) as fp:
+        for line in fp:
+            yield line.rstrip('\r\n')
+
+
+def read_jsonl(path: str, encoding: str = 'utf-8',
+               use_mmap: bool = False) -> Iterator:
+    """
+    :param path: The JSON Lines file to read.
+    :param encoding: The text encoding.
+    :param use_mmap: See read_lines.
+    :return: a generator of decoded records, skipping blank lines.
+    """
+    loads = json.loads
+    for line in read_lines(path, encoding, use_mmap):
+        if line:
+            yield loads(line)
+
+
+def read_csv(path: str, header: bool = True, encoding: str = 'utf-8',
+             **fmtparams) -> Iterator:
+    """
+    :param path: The CSV file to read.
+    :param header: if True, yield dicts keyed by the first row; otherwise,
+        yield lists.
+    :param encoding: The text encoding.
+    :param fmtparams: Passed to csv.reader / csv.DictReader.
+    :return: a generator of rows.
+    """
+    with _open_text(path, 'r', encoding) as fp:
+        reader = csv.DictReader if header else csv.reader
+        yield from reader(fp, **fmtparams)
+
+
+class _Writer:
+
+    def __init__(self, path: str, encoding: str = 'utf-8'):
+        self.path = path
+        self._fp = _open_text(path, 'w', encoding)
+
+    def write_many(self, records: Sequence):
+        raise NotImplementedError
+
+    def close(self):
+        self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+        return False
+
+
+class LineWriter(_Writer):
+    """
+    Writes each record's str as a line, a batch per write call.
+    """
+
+    def write_many(self, records: Sequence):
+        self._fp.write(''.join(str(r) + '\n' for r in records))
+
+
+class JsonlWriter(_Writer):
+    """
+    Writes each record as a line of JSON, a batch per write call.
+    """
+
+    def write_many(self, records: Sequence):
+        dumps = json.dumps
+        self._fp.write(''.join(dumps(r) + '\n' for r in records))
+
+
+class CsvWriter(_Writer):
+    """
+    Writes dict records as CSV rows. The header comes from fieldnames or,
+    if not given, the keys of the first record.
+    """
+
+    def __init__(self, path: str, fieldnames: Sequence[str] = None,
+                 encoding: str = 'utf-8', **fmtparams):
+        super(CsvWriter, self).__init__(path, encoding)
+        self.fieldnames = fieldnames
+        self._fmtparams = fmtparams
+        self._writer = None
+
+    def write_many(self, records: Sequence):
+        if not records:
+            return
+        if self._writer is None:
+            fieldnames = self.fieldnames or list(records[0])
+            self._writer = csv.DictWriter(self._fp, fieldnames,
+                                          **self._fmtparams)
+            self._writer.writeheader()
+        self._writer.writerows(records)
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """
+    :param iterable: Any iterable.
+    :param size: The chunk length.
+    :return: a generator of lists of up to size consecutive items.
+    """
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+_END = object()
+
+
+def prefetch(iterable: Iterable, chunk_size: int = 1024,
+             max_chunks: int = 8) -> Iterator:
+    """
+    Read ahead from an iterable on a background thread.
+
+    Items are handed over in chunks to keep synchronization off the
+    per-item path. At most max_chunks chunks are buffered. Exceptions
+    raised while reading are re-raised in the consumer.
+
+    :param iterable: The source.
+    :param chunk_size: The number of items per hand-off.
+    :param max_chunks: The bound on buffered chunks.
+    :return: a generator over the source's items.
+    """
+    buffer, cond = deque(), threading.Condition()
+    stopped = []
+
+    def fill():
+        try:
+            for chunk in chunked(iterable, chunk_size):
+                with cond:
+                    while len(buffer) >= max_chunks and not stopped:
+                        cond.wait()
+                    if stopped:
+                        return
+                    buffer.append(chunk)
+                    cond.notify_all()
+            tail = _END
+        except BaseException as e:
+            tail = e
+        with cond:
+            buffer.append(tail)
+            cond.notify_all()
+
+    thread = threading.Thread(target=fill, name='modpipe-prefetch',
+                              daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            with cond:
+                while not buffer:
+                    cond.wait()
+                chunk = buffer.popleft()
+                cond.notify_all()
+
+            if chunk is _END:
+                return
+            elif isinstance(chunk, BaseException):
+                raise chunk
+            yield from chunk
+    finally:
+        with cond:
+            stopped.append(True)
+            cond.notify_all()
@@ -0,0 +1,88 @@
+import json
+from collections import deque
+from random import random
+from typing import Callable, List
+
+
+class Trace:
+    """
+    One sampled item's path through a pipeline: its arguments, then a
+    (stage, input, output, exit) step for each stage it reached. The exit
+    is 'value', 'none', 'done', 'drop', 'skip' or, for the last step of a
+    failed item, 'error' (with the exception as the output).
+
+    Values are kept by reference, not copied.
+    """
+
+    __slots__ = ('args', 'steps')
+
+    def __init__(self, args: tuple):
+        self.args = args
+        self.steps = []
+
+    def to_dict(self) -> dict:
+        return {
+            'args': self.args,
+            'steps': [{'stage': stage, 'input': x, 'output': y, 'exit': e}
+                      for stage, x, y, e in self.steps],
+        }
+
+    def __repr__(self):
+        path = ' -> '.join('{}:{}'.format(stage, e)
+                           for stage, _, _, e in self.steps)
+        return "Trace({!r}: {})".format(self.args, path)
+
+
+class Tracer:
+    """
+    Samples items and keeps the traces of the most recent capacity of them
+    in a ring buffer.
+    """
+
+    def __init__(self, rate: float = 0.01, predicate: Callable = None,
+                 capacity: int = 1000):
+        """
+        :param rate: The fraction of items to trace, if no predicate.
+        :param predicate: If given, trace exactly the items whose arguments
+            it returns True for, as in ``predicate(*args)``.
+        :param capacity: The number of traces kept.
+        """
+        self.rate = rate
+        self.predicate = predicate
+        self.traces = deque(maxlen=capacity)
+
+    def sample(self, args: tuple) -> bool:
+        """
+        :param args: An item's positional arguments.
+        :return: True if the item should be traced.
+        """
+        if self.predicate is not None:
+            return bool(self.predicate(*args))
+        return random() < self.rate
+
+    def begin(self, args: tuple) -> Trace:
+        """
+        :param args: A sampled item's positional arguments.
+        :return: a new Trace, already in the buffer.
+        """
+        trace = Trace(args)
+        self.traces.append(trace)
+        return trace
+
+    def clear(self):
+        self.traces.clear()
+
+    def dump(self, path: str = None) -> List[dict]:
+        """
+        :param path: If given, also write the traces there as JSON Lines
+            (with values that aren't JSON serializable as their repr).
+        :return: the buffered traces, oldest first, as dicts.
+        """
+        dumped = [trace.to_dict() for trace in list(self.traces)]
+
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as fp:
+                for d in dumped:
+                    fp.write(json.dumps(d, default=repr) + '\n')
+
+        return dumped
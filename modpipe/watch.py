@@ -0,0 +1,134 @@
+"""
+Background hot reloading for long-running processes.
+"""
+import os
+import threading
+
+from modpipe.sources import fingerprint_file
+
+
+def _open_inotify():
+    # inotify_simple is optional; without it (or off Linux), just poll.
+    try:
+        from inotify_simple import INotify, flags
+        mask = flags.CLOSE_WRITE | flags.MOVED_TO
+        mask |= flags.CREATE | flags.DELETE
+        return INotify(), mask
+    except (ImportError, OSError):
+        return None, None
+
+
+class Watcher:
+    """
+    A daemon thread that keeps a ModPipe up to date with its source,
+    swapping in validated pipelines as edits land.
+    """
+
+    def __init__(self, pipe, interval: float = 1.0, on_reload=None,
+                 on_error=None, use_inotify: bool = True):
+        """
+        :param pipe: The ModPipe (or Chain) to reload.
+        :param interval: The seconds between checks for changes.
+        :param on_reload: Called with the pipe after each swap.
+        :param on_error: Called with the exception when a changed source
+            fails to load.
+        :param use_inotify: if True, use inotify_simple if available.
+        """
+        self.pipe = pipe
+        self.interval = interval
+        self.on_reload = on_reload
+        self.on_error = on_error
+
+        self.reloads = 0
+        self.errors = 0
+        self.last_error = None
+
+        self._inotify, self._mask = _open_inotify() if use_inotify \
+            else (None, None)
+        self._watched_dirs = set()
+        self._failed_state = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop,
+                                        name='modpipe-watch', daemon=True)
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._inotify is not None
+
+    def start(self) -> 'Watcher':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop watching, waiting for any reload in progress to finish.
+        """
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        if self._inotify is not None:
+            self._inotify.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+        return False
+
+    def _source_state(self):
+        state = []
+        for path in self.pipe._source_paths():
+            try:
+                state.append(fingerprint_file(path)[3])
+            except OSError:
+                state.append(None)
+        return tuple(state)
+
+    def _wait(self):
+        if self._inotify is None:
+            self._stop.wait(self.interval)
+            return
+
+        dirs = {os.path.dirname(p) for p in self.pipe._source_paths()}
+        for d in dirs - self._watched_dirs:
+            self._inotify.add_watch(d, self._mask)
+            self._watched_dirs.add(d)
+        self._inotify.read(timeout=int(self.interval * 1000))
+
+    def check(self) -> bool:
+        """
+        Reload now if the source changed.
+
+        :return: True if a new pipeline was swapped in.
+        """
+        if self._failed_state is not None:
+            # Don't retry a broken edit until the source changes again.
+            if self._source_state() == self._failed_state:
+                return False
+            self._failed_state = None
+
+        before = self.pipe._plan
+        try:
+            self.pipe.reload(validate=True)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = e
+            self._failed_state = self._source_state()
+            if self.on_error is not None:
+                self.on_error(e)
+            return False
+
+        if self.pipe._plan is before:
+            return False
+
+        self.reloads += 1
+        if self.on_reload is not None:
+            self.on_reload(self.pipe)
+        return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wait()
+            if not self._stop.is_set():
+                self.check()
@@ -0,0 +1,29 @@
+import sys
+import pytest
+
+
+@pytest.fixture
+def module_dir(tmp_path, monkeypatch):
+    """
+    A temporary directory on sys.path, for modules written by a test.
+    """
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def write_module(module_dir, monkeypatch):
+    """
+    :return: a function of a module name and source that writes the module
+        into module_dir. The first write of a name also forgets any import
+        of it left by an earlier test; later writes are edits for reload.
+    """
+    written = set()
+
+    def write(name, source):
+        if name not in written:
+            written.add(name)
+            monkeypatch.delitem(sys.modules, name, raising=False)
+        (module_dir / (name + '.py')).write_text(source)
+
+    return write
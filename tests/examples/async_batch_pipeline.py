@@ -0,0 +1,13 @@
+import asyncio
+
+from modpipe import batch
+
+
+async def parse(x):
+    await asyncio.sleep(0)
+    return int(x)
+
+
+@batch
+def square(xs):
+    return [x * x for x in xs]
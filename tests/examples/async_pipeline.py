@@ -0,0 +1,14 @@
+import asyncio
+
+
+def parse(x):
+    return int(x)
+
+
+async def enrich(x):
+    await asyncio.sleep(0)
+    return x, x * 10
+
+
+def combine(x, y):
+    return x + y
@@ -0,0 +1,26 @@
+from modpipe import batch, Done, SkipTo
+
+BATCH_SIZES = []
+
+
+def parse(x):
+    if x < 0:
+        return Done(None)
+    elif x == 0:
+        return SkipTo(finish, x)
+    return x, x + 1
+
+
+@batch
+def scale(pairs):
+    BATCH_SIZES.append(len(pairs))
+    return [(a * 10, b * 10) if a != 7 else Done('seven') for a, b in pairs]
+
+
+def total(a, b):
+    return a + b
+
+
+@batch
+def finish(xs):
+    return [None if x == 0 else -x for x in xs]
@@ -0,0 +1,6 @@
+from modpipe import batch
+
+
+@batch
+def sizes(xs):
+    return [len(xs)] * len(xs)
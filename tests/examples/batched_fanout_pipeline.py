@@ -0,0 +1,11 @@
+from modpipe import batch, fan_out
+
+
+@fan_out
+def repeat(x):
+    return [x] * x
+
+
+@batch
+def scale(xs):
+    return [10 * x for x in xs]
@@ -0,0 +1,9 @@
+def to_bytes(data):
+    if type(data).__name__ == 'ndarray':
+        return data * 2
+    return bytes(data)
+
+
+def reverse(data):
+    if isinstance(data, bytes):
+        return data[::-1]
@@ -0,0 +1,2 @@
+def publish(x):
+    return {'value': x}
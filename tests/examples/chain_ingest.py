@@ -0,0 +1,16 @@
+from modpipe import Done, SkipTo
+
+
+def parse(x):
+    return int(x)
+
+
+def route(x):
+    if x < 0:
+        return Done('negative')
+    if x == 0:
+        return SkipTo('publish', x)
+
+
+def load(x):
+    return x + 1
@@ -0,0 +1,11 @@
+from modpipe import Drop, batch, fan_out
+
+
+@fan_out
+def spread(x):
+    return range(x)
+
+
+@batch
+def odd_only(xs):
+    return [x if x % 2 else Drop for x in xs]
@@ -0,0 +1,16 @@
+from modpipe import Drop, Done
+
+
+def parse(x):
+    if x is None:
+        return Done(None)
+    return int(x)
+
+
+def only_even(x):
+    if x % 2:
+        return Drop
+
+
+def small(x):
+    return Drop if x > 10 else x * 10
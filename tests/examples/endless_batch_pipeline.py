@@ -0,0 +1,13 @@
+import itertools
+
+from modpipe import batch, fan_out
+
+
+@fan_out
+def forever(x):
+    return itertools.count(x)
+
+
+@batch
+def double(xs):
+    return [2 * x for x in xs]
@@ -0,0 +1,12 @@
+import itertools
+
+from modpipe import fan_out
+
+
+@fan_out
+def forever(x):
+    return itertools.count(x)
+
+
+def double(x):
+    return 2 * x
@@ -0,0 +1,13 @@
+from modpipe import Done, SkipTo
+
+
+def a(x):
+    return SkipTo(c, x + 1) if x else Done('zero')
+
+
+def b(x):
+    return x * 100
+
+
+def c(x):
+    return x * 2
@@ -0,0 +1,31 @@
+from modpipe import fan_out, Done, SkipTo
+
+
+def parse(doc):
+    return doc.strip()
+
+
+@fan_out
+def sentences(doc):
+    for s in doc.split('.'):
+        s = s.strip()
+        if not s:
+            continue
+        elif s == 'stop':
+            yield Done('<stop>')
+        elif s.startswith('#'):
+            yield SkipTo(shout, s[1:])
+        else:
+            yield s
+
+
+def words(s):
+    return s.split()
+
+
+def count(ws):
+    return len(ws)
+
+
+def shout(x):
+    return x if isinstance(x, int) else x.upper()
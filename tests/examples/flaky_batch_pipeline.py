@@ -0,0 +1,6 @@
+from modpipe import batch
+
+
+@batch
+def halve(xs):
+    return [100 // x for x in xs]
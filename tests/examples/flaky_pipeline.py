@@ -0,0 +1,16 @@
+from modpipe import SkipTo
+
+
+def parse(x):
+    return int(x)
+
+
+def check(x):
+    if x < 0:
+        raise ValueError("negative: {}".format(x))
+    if x == 0:
+        return SkipTo('nowhere', x)
+
+
+def invert(x):
+    return 100 // x
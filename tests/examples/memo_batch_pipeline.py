@@ -0,0 +1,19 @@
+from modpipe import batch, fan_out, memoize
+
+CALLS = []
+
+
+@memoize
+def normalize(code):
+    CALLS.append(code)
+    return code.strip().upper()
+
+
+@batch
+def tag(codes):
+    return [{'code': code} for code in codes]
+
+
+@fan_out
+def split(record):
+    return [record, record]
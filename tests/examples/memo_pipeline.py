@@ -0,0 +1,13 @@
+from modpipe import memoize
+
+CALLS = []
+
+
+@memoize(maxsize=2)
+def normalize(code):
+    CALLS.append(code)
+    return code.strip().upper()
+
+
+def tag(code):
+    return {'code': code}
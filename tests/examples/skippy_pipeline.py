@@ -0,0 +1,23 @@
+import threading
+
+from modpipe import Done, SkipTo
+
+THREADS = {}
+
+
+def first(x):
+    THREADS.setdefault('first', set()).add(threading.get_ident())
+    if x % 3 == 0:
+        return Done(-x)
+    if x % 3 == 1:
+        return SkipTo(last, x)
+    return x
+
+
+def middle(x):
+    THREADS.setdefault('middle', set()).add(threading.get_ident())
+    return x * 10
+
+
+def last(x):
+    return x + 1
@@ -0,0 +1,20 @@
+from modpipe import Done, SkipTo
+
+
+def parse(x):
+    return int(x)
+
+
+def clean(x):
+    if x < 0:
+        return Done(0)
+    if x > 100:
+        return SkipTo('publish', 100)
+
+
+def enrich(x):
+    return x * 2
+
+
+def publish(x):
+    return {'value': x}
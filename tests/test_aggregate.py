@@ -0,0 +1,128 @@
+import os
+import random
+from collections import Counter
+
+import pytest
+
+from modpipe import ModPipe
+from modpipe.aggregate import Aggregate, Count, Distinct, Max, Min, Sum
+
+
+def first(pair):
+    return pair[0]
+
+
+def second(pair):
+    return pair[1]
+
+
+def by_sign(x):
+    return x[0] > 0
+
+
+@pytest.fixture
+def pairs():
+    rng = random.Random(42)
+    return [(rng.randrange(50), rng.randrange(10)) for _ in range(2000)]
+
+
+@pytest.mark.parametrize('max_keys', [1000, 7])
+def test_count_and_spill(tmp_path, pairs, max_keys):
+    with Aggregate(first, Count(), max_keys=max_keys,
+                   spill_dir=str(tmp_path)) as agg:
+        agg.write_many(pairs[:1000])
+        for pair in pairs[1000:]:
+            agg.add(pair)
+
+        assert (agg.spills > 0) == (max_keys < 50)
+        items = list(agg.items())
+        assert [k for k, _ in items] == sorted(Counter(map(first, pairs)))
+        assert dict(items) == Counter(map(first, pairs))
+
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_many_runs_merge_in_batches(tmp_path, pairs, monkeypatch):
+    import heapq
+    from types import SimpleNamespace
+    from modpipe import aggregate
+
+    widths = []
+
+    def merge(*runs, **kwargs):
+        widths.append(len(runs))
+        return heapq.merge(*runs, **kwargs)
+
+    monkeypatch.setattr(aggregate, 'heapq', SimpleNamespace(merge=merge))
+
+    with Aggregate(first, Count(), max_keys=1, spill_dir=str(tmp_path),
+                   max_open_runs=4) as agg:
+        agg.write_many(pairs)
+        assert agg.spills > 100
+        assert agg.result() == Counter(map(first, pairs))
+        assert agg.spills <= 4
+        # Each merge reads at most 4 run files, plus the in-memory table.
+        assert max(widths) <= 5
+
+    assert os.listdir(str(tmp_path)) == []
+
+
+@pytest.mark.parametrize('agg, expected', [
+    (Sum(), lambda vs: sum(vs)),
+    (Min(), min),
+    (Max(), max),
+    (Distinct(), set),
+])
+def test_aggs(pairs, agg, expected):
+    grouped = {}
+    for k, v in pairs:
+        grouped.setdefault(k, []).append(v)
+
+    with Aggregate(first, agg, second, max_keys=5) as sink:
+        sink.write_many(pairs)
+        assert sink.result() == {k: expected(vs) for k, vs in grouped.items()}
+
+
+def test_merge(pairs):
+    a = Aggregate(first, Count(), max_keys=10)
+    b = Aggregate(first, Count(), max_keys=10)
+    a.write_many(pairs[:1500])
+    b.write_many(pairs[1500:])
+    a.merge(b)
+    assert a.result() == Counter(map(first, pairs))
+    a.close()
+    b.close()
+
+
+@pytest.fixture
+def pipeline():
+    return ModPipe.on('tests.examples.ingest_pipeline')
+
+
+def test_pipeline_aggregate(pipeline):
+    with pipeline.aggregate(range(-5, 100), by_sign, Sum(), first,
+                            max_keys=1) as result:
+        assert result.result() == {False: sum(2 * x for x in range(-5, 1)),
+                                   True: sum(2 * x for x in range(1, 100))}
+
+
+def test_pipeline_aggregate_on_workers(pipeline):
+    with pipeline.aggregate(range(-5, 100), by_sign, Count(), workers=2,
+                            chunksize=10) as result:
+        assert result.result() == {False: 6, True: 99}
+
+
+def test_worker_aggregation_bounds_read_ahead(pipeline):
+    from modpipe.parallel import paggregate
+    consumed = []
+
+    def items():
+        for i in range(10000):
+            consumed.append(i)
+            yield i
+
+    it = paggregate(pipeline._worker_spec(), items(), by_sign, Count(),
+                    workers=2, chunksize=10, max_pending=3)
+    next(it)
+    assert len(consumed) <= 4 * 10 + 1
+    it.close()
@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+
+from modpipe import ModPipe
+
+
+@pytest.fixture
+def async_pipeline():
+    return ModPipe.on('tests.examples.async_pipeline')
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_detects_async_stages(async_pipeline):
+    assert async_pipeline._plan.awaits == (False, True, False)
+
+
+def test_sync_call_fails_loudly(async_pipeline):
+    with pytest.raises(RuntimeError):
+        async_pipeline('1')
+
+
+def test_acall(async_pipeline):
+    assert run(async_pipeline.acall('2')) == 22
+
+
+def test_acall_on_sync_pipeline():
+    pipeline = ModPipe.on('tests.examples.math_mod')
+    assert run(pipeline.acall(42, 42)) == pipeline(42, 42)
+
+
+def test_amap(async_pipeline):
+    async def collect(items):
+        return [res async for res in async_pipeline.amap(items, 3)]
+
+    items = [str(i) for i in range(20)]
+    assert run(collect(items)) == [11 * i for i in range(20)]
+
+
+def test_amap_over_async_iterable(async_pipeline):
+    async def items():
+        for i in range(5):
+            yield str(i)
+
+    async def collect():
+        return [res async for res in async_pipeline.amap(items())]
+
+    assert run(collect()) == [11 * i for i in range(5)]
+
+
+def test_batch_stages_in_async_pipeline():
+    pipeline = ModPipe.on('tests.examples.async_batch_pipeline')
+    assert run(pipeline.acall('3')) == 9
+
+    async def collect(items):
+        return [res async for res in pipeline.amap(items, 2)]
+
+    assert run(collect(['1', '2', '3'])) == [1, 4, 9]
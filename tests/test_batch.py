@@ -0,0 +1,85 @@
+import pytest
+
+from modpipe import ModPipe
+from modpipe.plan import Plan
+from modpipe.helpers import compile_signatures
+from tests.examples import batch_pipeline
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = ModPipe('tests.examples.batch_pipeline')
+    del batch_pipeline.BATCH_SIZES[:]
+    return pipeline
+
+
+def test_batch_stages_flagged(pipeline):
+    assert [opts is not None for opts in pipeline._plan.batched] == [
+        False, True, False, True]
+
+
+def test_single_call(pipeline):
+    assert pipeline(1) == -30
+    assert pipeline(0) == 0
+    assert pipeline(-5) is None
+    assert pipeline(7) == 'seven'
+
+
+def test_bulk_masks_exited_items(pipeline):
+    items = [1, -1, 0, 7, 2, 3]
+    assert pipeline.map(items, batch_size=4) == [
+        -30, None, 0, 'seven', -50, -70]
+
+    # Only survivors of parse reach scale: [1, 7] then [2, 3].
+    assert batch_pipeline.BATCH_SIZES == [2, 2]
+
+
+def test_bulk_matches_single(pipeline):
+    items = list(range(-3, 20))
+    assert pipeline.map(items, batch_size=5) == [pipeline(x) for x in items]
+
+
+def test_wrong_length_fails_loudly():
+    from modpipe import batch
+
+    @batch
+    def bad(xs):
+        return []
+
+    seq = {'bad': bad}
+    plan = Plan(seq, compile_signatures(seq))
+    with pytest.raises(RuntimeError):
+        plan.run_batch([(1,), (2,)])
+
+
+def test_array_batches():
+    numpy = pytest.importorskip('numpy')
+    from modpipe import batch
+
+    @batch(array=True)
+    def double(xs):
+        assert isinstance(xs, numpy.ndarray)
+        return xs * 2
+
+    seq = {'double': double}
+    plan = Plan(seq, compile_signatures(seq))
+    assert list(plan.imap_batched(range(5), 2)) == [0, 2, 4, 6, 8]
+
+
+def test_workers_batch_their_chunks():
+    pipeline = ModPipe.on('tests.examples.batch_size_pipeline')
+    items = list(range(10))
+    assert list(pipeline.pmap(items, workers=2, chunksize=5)) == [5] * 10
+    assert list(pipeline.pmap(items, workers=2, chunksize=4)) == \
+        [4] * 8 + [2] * 2
+
+
+def test_workers_find_bad_records_in_failed_batches():
+    from modpipe import DeadLetters
+
+    pipeline = ModPipe.on('tests.examples.flaky_batch_pipeline')
+    letters = DeadLetters()
+    res = pipeline.pmap([1, 2, 0, 4, 5], workers=1, chunksize=5,
+                        dead_letters=letters)
+    assert list(res) == [100, 50, 25, 20]
+    assert [(d.item, d.stage) for d in letters.letters] == [(0, 'halve')]
@@ -0,0 +1,116 @@
+import os
+import pickle
+import sys
+import pytest
+
+from modpipe import ModPipe
+from modpipe.chain import Chain
+
+
+INGEST, CLEAN, ENRICH = ('tests.examples.chain_ingest',
+                         'tests.examples.chain_clean',
+                         'tests.examples.chain_enrich')
+
+
+@pytest.fixture
+def chain():
+    return ModPipe.chain(INGEST, CLEAN, ENRICH)
+
+
+def test_flattens_into_one_plan(chain):
+    assert isinstance(chain, Chain)
+    assert chain._plan.names == ('parse', 'route', INGEST + '.load',
+                                 CLEAN + '.load', 'publish')
+    assert chain('4') == {'value': 50}
+    assert repr(chain) == "ModPipe.chain({}, {}, {})".format(INGEST, CLEAN,
+                                                             ENRICH)
+
+
+def test_done_ends_the_whole_chain(chain):
+    assert chain('-3') == 'negative'
+
+
+def test_skip_to_a_later_module(chain):
+    assert chain('0') == {'value': 0}
+
+
+def test_add():
+    a, b, c = (ModPipe.on(name) for name in (INGEST, CLEAN, ENRICH))
+    chain = a + b + ENRICH
+    assert [x.module_name for x in chain.components] == \
+        [INGEST, CLEAN, ENRICH]
+    assert chain('4') == {'value': 50}
+    assert (INGEST + (b + c))('4') == {'value': 50}
+
+
+def test_bulk_modes(chain):
+    items = ['1', '-1', '0', '2']
+    expected = [{'value': 20}, 'negative', {'value': 0}, {'value': 30}]
+    assert chain.map(items) == expected
+    assert list(chain.tmap(items, threads=2)) == expected
+    assert list(chain.smap(items, segments=2)) == expected
+    assert list(chain.pmap(items, workers=2)) == expected
+
+
+def test_manifest_round_trip(chain):
+    del chain[CLEAN + '.load']
+    rebuilt = ModPipe.from_manifest(chain.manifest())
+    assert isinstance(rebuilt, Chain)
+    assert rebuilt._plan.names == chain._plan.names
+    assert rebuilt('4') == {'value': 5}
+
+
+def test_pickle(chain):
+    assert pickle.loads(pickle.dumps(chain))('4') == {'value': 50}
+
+
+def test_pickle_with_memoized_component():
+    chain = ModPipe.chain('tests.examples.memo_pipeline', ENRICH)
+    assert chain(' us') == {'value': {'code': 'US'}}
+
+    clone = pickle.loads(pickle.dumps(chain))
+    assert clone(' us') == {'value': {'code': 'US'}}
+    assert clone.cache_info()['normalize']['misses'] == 1
+    assert list(chain.pmap([' us', 'de '], workers=2)) == [
+        {'value': {'code': 'US'}}, {'value': {'code': 'DE'}}]
+
+
+def test_components_reload_independently(tmp_path, monkeypatch):
+    path = tmp_path / 'hot_clean.py'
+    path.write_text("def load(x):\n    return x * 10\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'hot_clean', raising=False)
+    chain = ModPipe.chain(INGEST, 'hot_clean', ENRICH)
+    assert chain('4') == {'value': 50}
+
+    plans = [c._plan for c in chain.components]
+    path.write_text("def load(x):\n    return x * 100\n")
+    st = os.stat(str(path))
+    os.utime(str(path), ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    chain.reload()
+    assert chain('4') == {'value': 500}
+    new_plans = [c._plan for c in chain.components]
+    assert new_plans[0] is plans[0] and new_plans[2] is plans[2]
+    assert new_plans[1] is not plans[1]
+
+    flat = chain._plan
+    chain.reload()
+    assert chain._plan is flat
+
+
+def test_reload_restores_deleted_stages(chain):
+    del chain[CLEAN + '.load']
+    assert chain('4') == {'value': 5}
+    chain.reload()
+    assert chain('4') == {'value': 50}
+
+
+def test_chain_of_chains():
+    chain = ModPipe.chain(ModPipe.chain(INGEST, CLEAN), ENRICH)
+    assert len(chain.components) == 3
+
+
+def test_empty_chain():
+    with pytest.raises(ValueError):
+        ModPipe.chain()
@@ -0,0 +1,98 @@
+import pytest
+
+from modpipe import ModPipe, Checkpoints
+
+PIPELINE = """
+import checkpoint_log
+from modpipe import Done, SkipTo
+
+
+def parse(x):
+    checkpoint_log.CALLS.append('parse')
+    if x < 0:
+        return Done('negative')
+    elif x == 0:
+        return SkipTo(finish, x)
+    return x
+
+
+def expensive(x):
+    checkpoint_log.CALLS.append('expensive')
+    return x * 10
+
+
+def finish(x):
+    checkpoint_log.CALLS.append('finish')
+    return x {}
+"""
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_log(write_module):
+    write_module('checkpoint_log', "CALLS = []\n")
+
+
+def calls():
+    import checkpoint_log
+    res = list(checkpoint_log.CALLS)
+    del checkpoint_log.CALLS[:]
+    return res
+
+
+def write_pipeline(write_module, name, finish):
+    write_module(name, PIPELINE.format(finish))
+
+
+def test_resumes_from_deepest_unchanged_stage(module_dir, write_module):
+    write_pipeline(write_module, 'ckpt_resume_pipeline', '+ 1')
+    pipeline = ModPipe('ckpt_resume_pipeline')
+    store = Checkpoints(str(module_dir / 'ckpt.db'))
+
+    assert pipeline.map([1, 2], store) == [11, 21]
+    assert calls() == ['parse', 'expensive', 'finish'] * 2
+
+    # Nothing changed, so nothing runs.
+    assert pipeline.map([1, 2], store) == [11, 21]
+    assert calls() == []
+
+    write_pipeline(write_module, 'ckpt_resume_pipeline', '+ 1000')
+    pipeline.reload()
+    assert pipeline.map([1, 2], store) == [1010, 1020]
+    assert calls() == ['finish', 'finish']
+    store.close()
+
+
+def test_done_and_skip_to_resume(write_module):
+    write_pipeline(write_module, 'ckpt_exit_pipeline', '+ 1')
+    pipeline = ModPipe('ckpt_exit_pipeline')
+
+    with Checkpoints(':memory:') as store:
+        assert pipeline.map([-1, 0], store) == ['negative', 1]
+        calls()
+        assert pipeline.map([-1, 0], store) == ['negative', 1]
+        assert calls() == []
+
+        # Edits change the file's size, so that bytecode cached within
+        # the same second can't be mistaken for current.
+        write_pipeline(write_module, 'ckpt_exit_pipeline', '- 10')
+        pipeline.reload()
+        assert pipeline.map([-1, 0], store) == ['negative', -10]
+        assert calls() == ['finish']
+
+
+def test_selected_stages_and_prune(write_module):
+    write_pipeline(write_module, 'ckpt_prune_pipeline', '+ 1')
+    pipeline = ModPipe('ckpt_prune_pipeline')
+
+    with Checkpoints(':memory:', stages=['expensive']) as store:
+        pipeline.map([1], store)
+        calls()
+
+        write_pipeline(write_module, 'ckpt_prune_pipeline', '+ 20')
+        pipeline.reload()
+        assert pipeline.map([1], store) == [30]
+        assert calls() == ['finish']
+
+        assert store.prune(pipeline._plan) == 0
+        del pipeline['expensive']
+        assert store.prune(pipeline._plan) == 1
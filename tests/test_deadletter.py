@@ -0,0 +1,107 @@
+import json
+import pytest
+
+from modpipe import ModPipe, Checkpoints, DeadLetters
+from modpipe.deadletter import ErrorBudgetExceeded
+from modpipe.plan import StageError
+
+
+ITEMS = ['1', 'x', '-5', '4', '0', '50']
+
+
+@pytest.fixture
+def pipeline():
+    return ModPipe.on('tests.examples.flaky_pipeline')
+
+
+def test_without_dead_letters_errors_propagate(pipeline):
+    with pytest.raises(ValueError):
+        pipeline.map(ITEMS)
+
+
+def test_run_located(pipeline):
+    with pytest.raises(StageError) as e:
+        pipeline._plan.run_located(('-5',))
+    assert e.value.stage == 'check'
+    assert isinstance(e.value.error, ValueError)
+    assert pipeline._plan.run_located(('4',)) == 25
+
+
+def test_map_routes_failures(pipeline):
+    letters = DeadLetters()
+    assert pipeline.map(ITEMS, dead_letters=letters) == [100, 25, 2]
+
+    assert (letters.seen, letters.failed) == (6, 3)
+    assert [(d.item, d.stage) for d in letters.letters] == [
+        ('x', 'parse'), ('-5', 'check'), ('0', 'check')]
+    assert isinstance(letters.letters[2].error, RuntimeError)
+    assert 'negative: -5' in letters.letters[1].traceback
+
+
+def test_letters_cap_and_file(tmp_path, pipeline):
+    path = str(tmp_path / 'dead.jsonl')
+    with DeadLetters(path, cap=1) as letters:
+        pipeline.map(ITEMS, dead_letters=letters)
+
+    assert len(letters.letters) == 1 and len(letters) == 3
+    with open(path) as fp:
+        records = [json.loads(line) for line in fp]
+    assert [r['item'] for r in records] == ['x', '-5', '0']
+    assert records[1]['error'] == 'ValueError'
+    assert records[1]['message'] == 'negative: -5'
+
+
+def test_max_errors(pipeline):
+    letters = DeadLetters(max_errors=1)
+    with pytest.raises(ErrorBudgetExceeded):
+        pipeline.map(ITEMS, dead_letters=letters)
+    assert letters.failed == 2
+
+
+def test_max_error_rate(pipeline):
+    items = ['1'] * 10 + ['x'] * 2
+
+    letters = DeadLetters(max_error_rate=0.2, min_items=5)
+    assert len(pipeline.map(items, dead_letters=letters)) == 10
+
+    letters = DeadLetters(max_error_rate=0.1, min_items=5)
+    with pytest.raises(ErrorBudgetExceeded):
+        pipeline.map(items, dead_letters=letters)
+
+
+def test_rate_applies_at_min_items(pipeline):
+    letters = DeadLetters(max_error_rate=0.1, min_items=4)
+    with pytest.raises(ErrorBudgetExceeded):
+        pipeline.map(['x', 'x', '1', '1', '1'], dead_letters=letters)
+    assert letters.seen == 4
+
+
+def test_tmap(pipeline):
+    letters = DeadLetters()
+    assert list(pipeline.tmap(ITEMS, threads=2, dead_letters=letters)) == \
+        [100, 25, 2]
+    assert letters.failed == 3
+
+
+def test_pmap(pipeline):
+    letters = DeadLetters()
+    assert list(pipeline.pmap(ITEMS, workers=2, chunksize=2,
+                              dead_letters=letters)) == [100, 25, 2]
+    assert [d.stage for d in letters.letters] == ['parse', 'check', 'check']
+
+
+def test_checkpoints(tmp_path, pipeline):
+    letters = DeadLetters()
+    with Checkpoints(str(tmp_path / 'ckpt.db')) as store:
+        res = pipeline.map(ITEMS, checkpoints=store, dead_letters=letters)
+    assert res == [100, 25, 2]
+    assert [d.stage for d in letters.letters] == ['parse', 'check', 'check']
+
+
+def test_failed_batches_are_isolated():
+    pipeline = ModPipe.on('tests.examples.flaky_batch_pipeline')
+
+    letters = DeadLetters()
+    res = pipeline.map([1, 2, 0, 4, 5], batch_size=2, dead_letters=letters)
+    assert res == [100, 50, 25, 20]
+    assert [(d.item, d.stage) for d in letters.letters] == [(0, 'halve')]
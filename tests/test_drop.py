@@ -0,0 +1,101 @@
+import asyncio
+import pickle
+import pytest
+
+import modpipe
+from modpipe import ModPipe, Drop, Done, DeadLetters
+
+
+ITEMS = ['1', '2', None, '3', '4', '12']
+
+
+@pytest.fixture
+def pipeline():
+    return ModPipe.on('tests.examples.drop_pipeline')
+
+
+def test_drop_is_a_singleton():
+    assert modpipe.Drop is Drop
+    assert isinstance(Drop, Done)
+    assert repr(Drop) == 'Drop'
+    assert pickle.loads(pickle.dumps(Drop)) is Drop
+
+
+def test_call_returns_drop(pipeline):
+    assert pipeline('1') is Drop
+    assert pipeline('2') == 20
+
+
+def test_bulk_modes_drop_items(pipeline):
+    expected = [20, None, 40]
+    assert pipeline.map(ITEMS) == expected
+    assert list(pipeline.tmap(ITEMS, threads=2)) == expected
+    assert list(pipeline.smap(ITEMS)) == expected
+    assert list(pipeline.pmap(ITEMS, workers=2)) == expected
+
+    out = []
+    pipeline.run(ITEMS, out)
+    assert out == expected
+
+
+def test_amap_drops_items(pipeline):
+    async def collect():
+        return [x async for x in pipeline.amap(ITEMS)]
+
+    assert asyncio.new_event_loop().run_until_complete(collect()) == \
+        [20, None, 40]
+
+
+def test_drop_counts(pipeline):
+    pipeline.map(ITEMS)
+    assert pipeline.drop_counts() == {'parse': 0, 'only_even': 2,
+                                      'small': 1}
+
+    pipeline('5')
+    assert pipeline.drop_counts()['only_even'] == 3
+
+
+def test_drop_counts_with_stats(pipeline):
+    pipeline.enable_stats()
+    pipeline.map(ITEMS)
+    assert pipeline.stats()['only_even']['dropped'] == 2
+    assert pipeline.stats()['parse']['done'] == 1
+    assert pipeline.drop_counts()['small'] == 1
+
+    pipeline.disable_stats()
+    assert pipeline.drop_counts()['small'] == 1
+
+
+def test_slices_share_drop_counts(pipeline):
+    view = pipeline['only_even':]
+    assert view.map([2, 3, 12]) == [20]
+    assert view.drop_counts() == {'only_even': 1, 'small': 1}
+    assert pipeline.drop_counts() == {'parse': 0, 'only_even': 1,
+                                      'small': 1}
+
+    pipeline.enable_stats()
+    pipeline('5')
+    view(14)
+    assert view.drop_counts() == {'only_even': 2, 'small': 2}
+
+
+def test_drop_with_dead_letters(pipeline):
+    letters = DeadLetters()
+    assert pipeline.map(ITEMS + ['x'], dead_letters=letters) == \
+        [20, None, 40]
+    assert letters.failed == 1
+    assert pipeline.drop_counts()['only_even'] == 2
+
+
+def test_drop_in_batches_and_fan_out():
+    pipeline = ModPipe.on('tests.examples.drop_fanout_pipeline')
+
+    assert pipeline.map([4, 3]) == [1, 3, 1]
+    assert pipeline(4) == [1, 3]
+    assert pipeline.drop_counts()['odd_only'] == 6
+
+
+def test_traced_drops(pipeline):
+    pipeline.enable_tracing(rate=1.0)
+    pipeline('1')
+    assert pipeline.traces()[0]['steps'][-1]['exit'] == 'drop'
@@ -0,0 +1,83 @@
+import itertools
+import pytest
+
+from modpipe import ModPipe, DeadLetters, fan_out, Checkpoints
+
+
+DOCS = [' One two. Three. ', 'stop. Four five six', '#hi. x', '']
+OUTPUTS = [[2, 1], ['<stop>', 3], ['HI', 1], []]
+FLAT = [x for outs in OUTPUTS for x in outs]
+
+
+@pytest.fixture
+def pipeline():
+    return ModPipe.on('tests.examples.fanout_pipeline')
+
+
+def test_call_returns_all_outputs(pipeline):
+    for doc, outs in zip(DOCS, OUTPUTS):
+        assert pipeline(doc) == outs
+
+
+def test_imap_is_flat(pipeline):
+    assert pipeline.map(DOCS) == FLAT
+    assert list(pipeline.imap(iter(DOCS))) == FLAT
+
+
+def test_unbounded_fan_out_streams():
+    pipeline = ModPipe.on('tests.examples.endless_pipeline')
+    assert list(itertools.islice(pipeline.imap([5]), 3)) == [10, 12, 14]
+
+    outputs = pipeline.imap([5], dead_letters=DeadLetters())
+    assert list(itertools.islice(outputs, 3)) == [10, 12, 14]
+
+
+def test_unbounded_fan_out_streams_in_batches():
+    pipeline = ModPipe.on('tests.examples.endless_batch_pipeline')
+    assert list(itertools.islice(pipeline.imap([5]), 3)) == [10, 12, 14]
+
+    outputs = pipeline.smap([5], chunksize=2)
+    try:
+        assert list(itertools.islice(outputs, 3)) == [10, 12, 14]
+    finally:
+        outputs.close()
+
+
+def test_pool_modes(pipeline):
+    assert list(pipeline.tmap(DOCS, threads=2)) == FLAT
+    assert list(pipeline.pmap(DOCS, workers=2)) == FLAT
+    assert list(pipeline.smap(DOCS, chunksize=3)) == FLAT
+
+
+def test_dead_letters_count_items(pipeline):
+    letters = DeadLetters()
+    assert pipeline.map(DOCS + [None], dead_letters=letters) == FLAT
+    assert (letters.seen, letters.failed) == (5, 1)
+    assert letters.letters[0].stage == 'parse'
+
+
+def test_failures_inside_fan_out_are_located(pipeline):
+    letters = DeadLetters()
+    pipeline.map([b'bytes'], dead_letters=letters)
+    assert letters.letters[0].stage == 'sentences'
+
+
+def test_batched_fan_out():
+    pipeline = ModPipe.on('tests.examples.batched_fanout_pipeline')
+    assert pipeline.map([1, 0, 2, 3], batch_size=2) == [10, 20, 20, 30,
+                                                        30, 30]
+    assert pipeline(2) == [20, 20]
+
+
+def test_checkpoints_refused(tmp_path, pipeline):
+    with Checkpoints(str(tmp_path / 'c.db')) as store:
+        with pytest.raises(RuntimeError):
+            pipeline.map(DOCS, checkpoints=store)
+
+
+def test_async_stages_refused():
+    async def f(x):
+        return x
+
+    with pytest.raises(TypeError):
+        fan_out(f)
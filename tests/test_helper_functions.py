@@ -96,3 +96,21 @@ def test_load_pipeline_seq():
     pipeline_seq = load_pipeline_seq(math_mod, True, starts_with_rot)
 
     assert list(pipeline_seq) == ['normed', 'times_ten']
+
+
+def test_binding_linenos():
+    import ast
+    from modpipe.helpers import binding_linenos
+
+    src = "\n".join([
+        "def f(x): pass",
+        "ff = F()",
+        "if True:",
+        "    g = ff",
+        "def h(x):",
+        "    inner = 1",
+        "ff = F()",
+    ])
+
+    res = binding_linenos(ast.parse(src))
+    assert res == {'f': 1, 'ff': 7, 'g': 4, 'h': 5}
@@ -0,0 +1,58 @@
+import json
+import subprocess
+import sys
+import pytest
+
+from modpipe import ModPipe
+from modpipe import helpers
+
+
+@pytest.fixture
+def math_pipeline():
+    return ModPipe('tests.examples.math_mod')
+
+
+def test_manifest_is_json(math_pipeline):
+    manifest = json.loads(json.dumps(math_pipeline.manifest()))
+    assert manifest['module'] == 'tests.examples.math_mod'
+    assert manifest['stages'] == [['normed', 2], ['rot90', 2],
+                                  ['times_ten', 2]]
+
+
+def test_from_manifest_skips_introspection(math_pipeline, monkeypatch):
+    manifest = math_pipeline.manifest()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Source introspection in from_manifest")
+
+    monkeypatch.setattr(helpers, 'parse_module', fail)
+    monkeypatch.setattr(helpers, 'load_pipeline_seq', fail)
+    monkeypatch.setattr(helpers, 'compile_signatures', fail)
+
+    pipe = ModPipe.from_manifest(manifest)
+    for args in [(0, 1), (0, 0), (42, 42)]:
+        assert pipe(*args) == math_pipeline(*args)
+
+
+def test_from_manifest_keeps_deletions(math_pipeline):
+    del math_pipeline['normed']
+    pipe = ModPipe.from_manifest(math_pipeline.manifest())
+    assert list(pipe._pipeline) == ['rot90', 'times_ten']
+
+
+def test_stale_manifest_falls_back_to_full_load(math_pipeline):
+    manifest = math_pipeline.manifest()
+    manifest['source_sha1'] = 'stale'
+    manifest['stages'] = manifest['stages'][1:]
+
+    pipe = ModPipe.from_manifest(manifest)
+    assert list(pipe._pipeline) == ['rot90', 'times_ten']
+
+
+def test_import_is_lazy():
+    code = ("import sys, modpipe; "
+            "assert 'modpipe.modpipe_impl' not in sys.modules; "
+            "modpipe.ModPipe; "
+            "assert 'modpipe.modpipe_impl' in sys.modules; "
+            "assert 'modpipe.helpers' not in sys.modules")
+    subprocess.check_call([sys.executable, '-c', code])
@@ -0,0 +1,122 @@
+import pickle
+import pytest
+
+from modpipe import ModPipe, memoize
+from modpipe.memo import StageCache
+from tests.examples import memo_pipeline
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = ModPipe('tests.examples.memo_pipeline')
+    del memo_pipeline.CALLS[:]
+    return pipeline
+
+
+def test_memoized_stage_is_cached(pipeline):
+    assert pipeline.map([' us', ' us', 'de ']) == [
+        {'code': 'US'}, {'code': 'US'}, {'code': 'DE'}]
+    assert memo_pipeline.CALLS == [' us', 'de ']
+
+    info = pipeline.cache_info()
+    assert list(info) == ['normalize']
+    assert info['normalize']['hits'] == 1
+    assert info['normalize']['misses'] == 2
+
+
+def test_lru_eviction(pipeline):
+    pipeline.map(['a', 'b', 'a', 'c', 'b'])
+    # 'b' was least recently used when 'c' arrived.
+    assert memo_pipeline.CALLS == ['a', 'b', 'c', 'b']
+    assert pipeline.cache_info()['normalize']['size'] == 2
+
+
+def test_byte_bound():
+    cache = StageCache(maxsize=100, maxbytes=1)
+    f = cache.wrap(lambda x: x)
+    f('abc')
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_unhashable_inputs_bypass_cache():
+    cache = StageCache()
+    f = cache.wrap(lambda x: len(x))
+    assert f([1, 2]) == 2
+    assert cache.info()['uncacheable'] == 1
+
+
+def test_caches_survive_reload(pipeline):
+    pipeline('x')
+    pipeline.reload(force=True)
+    pipeline('x')
+    assert pipeline.cache_info()['normalize']['hits'] == 1
+
+
+def test_empty_caches_survive_reinstall(pipeline):
+    # Unhashable, so counted without filling the cache.
+    pipeline(bytearray(b' us'))
+    pipeline.enable_stats()
+    assert pipeline.cache_info()['normalize']['uncacheable'] == 1
+
+
+def test_enable_stats_keeps_one_cache_layer(pipeline):
+    pipeline('x')
+    pipeline.enable_stats()
+    pipeline.map(['x', 'y', 'y'])
+
+    info = pipeline.cache_info()['normalize']
+    assert (info['hits'], info['misses']) == (2, 2)
+    assert memo_pipeline.CALLS == ['x', 'y']
+    assert pipeline.stats()['normalize']['calls'] == 3
+
+
+def test_clear_caches(pipeline):
+    pipeline('x')
+    pipeline.clear_caches()
+    pipeline('x')
+    assert memo_pipeline.CALLS == ['x', 'x']
+
+
+def test_edited_stage_drops_cache(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    src = tmp_path / 'memo_edit_pipeline.py'
+    body = "from modpipe import memoize\n\n\n@memoize\ndef f(x):\n    return x {}\n"
+    src.write_text(body.format("+ 1"))
+
+    pipeline = ModPipe('memo_edit_pipeline')
+    assert pipeline(1) == 2
+
+    src.write_text(body.format("+ 100"))
+    pipeline.reload()
+    assert pipeline(1) == 101
+    assert pipeline.cache_info()['f']['misses'] == 1
+
+
+def test_memoized_pipeline_is_picklable(pipeline):
+    pipeline('x')
+    clone = pickle.loads(pickle.dumps(pipeline))
+    assert clone('x') == {'code': 'X'}
+    assert clone.cache_info()['normalize']['misses'] == 1
+
+
+def test_cant_memoize_async():
+    async def f(x):
+        return x
+
+    with pytest.raises(TypeError):
+        memoize(f)
+
+
+def test_batch_and_fan_out_pipelines_use_caches():
+    from tests.examples import memo_batch_pipeline
+    del memo_batch_pipeline.CALLS[:]
+    pipeline = ModPipe('tests.examples.memo_batch_pipeline')
+    pipeline.enable_stats()
+
+    assert pipeline(' us') == [{'code': 'US'}, {'code': 'US'}]
+    assert pipeline(' us') == [{'code': 'US'}, {'code': 'US'}]
+    assert list(pipeline.tmap([' us', 'de '], threads=2)) == [
+        {'code': 'US'}, {'code': 'US'}, {'code': 'DE'}, {'code': 'DE'}]
+    assert memo_batch_pipeline.CALLS == [' us', 'de ']
+    assert pipeline.cache_info()['normalize']['hits'] == 2
@@ -1,6 +1,7 @@
 import os
 import pytest
 import pickle
+from collections import OrderedDict
 
 from modpipe import ModPipe
 
@@ -36,6 +37,17 @@ def test_del(math_pipeline):
     assert math_pipeline(1, 1) == (10, -10)
 
 
+def test_reload_restores_deleted_stages(math_pipeline):
+    expected = math_pipeline(1, 1)
+    del math_pipeline['normed']
+    with math_pipeline:
+        assert math_pipeline(1, 1) == expected
+
+    del math_pipeline['normed']
+    math_pipeline.reload()
+    assert 'normed' in math_pipeline._pipeline
+
+
 def test_name(math_pipeline):
     assert math_pipeline.module_name == 'tests.examples.math_mod'
 
@@ -67,6 +79,138 @@ def test_ipython_key_completions(math_pipeline):
 
 
 def test_guards_against_cycles():
-    pipeline = ModPipe.on("tests.examples.malformed_skipto")
-    with pytest.raises(RuntimeError):
-        pipeline(41)
+    with pytest.raises(RuntimeError) as e:
+        ModPipe.on("tests.examples.malformed_skipto")
+    e.match("g skips backwards to f")
+
+
+def test_skip_to_missing_stage(math_pipeline):
+    del math_pipeline['times_ten']
+    with pytest.raises(RuntimeError) as e:
+        math_pipeline(42, 42)
+    e.match("Pipeline ended before encountering ScaleAll")
+
+
+def test_skip_to_by_name():
+    from modpipe.helpers import compile_signatures
+    from modpipe.plan import Plan
+    from modpipe import SkipTo
+
+    def f(x):
+        return SkipTo('h', x)
+
+    def g(x):
+        assert False  # Not called
+
+    def h(x):
+        return x + 1
+
+    seq = OrderedDict([('f', f), ('g', g), ('h', h)])
+    plan = Plan(seq, compile_signatures(seq))
+    assert plan.run((1,)) == 2
+
+
+def test_map():
+    pipeline = ModPipe.on('tests.examples.tuples_pipeline')
+    items = [1, 2, 10]
+    expected = [pipeline(item) for item in items]
+    assert pipeline.map(items) == expected
+
+
+def test_imap_is_lazy():
+    def items():
+        yield 1
+        raise ValueError("Consumed too far")
+
+    pipeline = ModPipe.on('tests.examples.ingest_pipeline')
+    it = pipeline.imap(items())
+    assert next(it) == (2, -2)
+    with pytest.raises(ValueError):
+        next(it)
+
+
+def test_pmap():
+    pipeline = ModPipe.on('tests.examples.tuples_pipeline')
+    items = list(range(100))
+    expected = pipeline.map(items)
+
+    assert list(pipeline.pmap(items, workers=2, chunksize=8)) == expected
+
+    res = pipeline.pmap(items, workers=2, chunksize=8, ordered=False)
+    assert sorted(res) == sorted(expected)
+
+
+def test_pmap_bounds_read_ahead():
+    consumed = []
+
+    def items():
+        for i in range(10000):
+            consumed.append(i)
+            yield i
+
+    pipeline = ModPipe.on('tests.examples.tuples_pipeline')
+    for ordered in (True, False):
+        del consumed[:]
+        it = pipeline.pmap(items(), workers=2, chunksize=8, max_pending=3,
+                           ordered=ordered)
+        next(it)
+        assert len(consumed) <= 4 * 8 + 1
+        it.close()
+
+
+def test_ordered_chunks_skip_completion_callbacks():
+    from multiprocessing.pool import ThreadPool
+    from modpipe.parallel import _imap_chunks
+
+    class RecordingPool(ThreadPool):
+
+        def apply_async(self, func, args=(), kwds={}, callback=None,
+                        error_callback=None):
+            callbacks.append(callback)
+            return super().apply_async(func, args, kwds, callback,
+                                       error_callback)
+
+    def task(chunk):
+        return [x + 1 for x in chunk]
+
+    for ordered in (True, False):
+        callbacks = []
+        with RecordingPool(2) as pool:
+            res = list(_imap_chunks(pool, task, [[1], [2], [3]], ordered, 2))
+        assert sorted(res) == [2, 3, 4]
+        assert callbacks and all((cb is None) == ordered for cb in callbacks)
+
+
+def test_pmap_honors_deletions():
+    pipeline = ModPipe.on('tests.examples.ingest_pipeline')
+    del pipeline['weird_pair']
+    assert list(pipeline.pmap([1, 2], workers=1)) == [2, 4]
+
+
+def test_tmap():
+    pipeline = ModPipe.on('tests.examples.tuples_pipeline')
+    items = list(range(100))
+    res = pipeline.tmap(items, threads=4, max_pending=3)
+    assert list(res) == pipeline.map(items)
+
+
+def test_tmap_bounds_in_flight_items():
+    consumed = []
+
+    def items():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    pipeline = ModPipe.on('tests.examples.tuples_pipeline')
+    it = pipeline.tmap(items(), threads=2, max_pending=4)
+    next(it)
+    assert len(consumed) <= 5
+    it.close()
+
+
+def test_del_does_not_mutate_running_plan(math_pipeline):
+    plan = math_pipeline._plan
+    del math_pipeline['normed']
+    assert 'normed' in plan.names
+    assert 'normed' not in math_pipeline._pipeline
@@ -0,0 +1,44 @@
+import pickle
+
+from modpipe import ModPipe
+from modpipe import parallel
+
+
+def fake_map_partitions(partitions, f):
+    """Mimic rdd.mapPartitions: ship f once per partition, as Spark does."""
+    for partition in partitions:
+        shipped = pickle.loads(pickle.dumps(f))
+        yield from shipped(iter(partition))
+
+
+def test_partition_fn_matches_map():
+    pipeline = ModPipe.on('tests.examples.tuples_pipeline')
+    partitions = [[1, 2, 3], [], [4, 5]]
+
+    res = list(fake_map_partitions(partitions, pipeline.partition_fn()))
+    assert res == pipeline.map([1, 2, 3, 4, 5])
+
+
+def test_pipeline_built_once_per_process(monkeypatch):
+    builds = []
+    original = parallel.build_from_spec
+
+    def counting_build(spec):
+        builds.append(spec)
+        return original(spec)
+
+    monkeypatch.setattr(parallel, 'build_from_spec', counting_build)
+    monkeypatch.setattr(parallel, '_partition_pipes', {})
+
+    pipeline = ModPipe.on('tests.examples.ingest_pipeline')
+    f = pipeline.partition_fn()
+    list(fake_map_partitions([[1], [2], [3]], f))
+
+    assert len(builds) == 1
+
+
+def test_partition_fn_honors_deletions():
+    pipeline = ModPipe.on('tests.examples.ingest_pipeline')
+    del pipeline['weird_pair']
+    res = list(fake_map_partitions([[1, 2]], pipeline.partition_fn()))
+    assert res == [2, 4]
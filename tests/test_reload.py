@@ -0,0 +1,90 @@
+import os
+import sys
+import pytest
+
+from modpipe import ModPipe
+
+
+@pytest.fixture(autouse=True)
+def reload_counter(write_module):
+    write_module('reload_counter', "LOADS = []\nSCALE = 2\n")
+
+
+def write_pipeline(write_module, name, body):
+    src = "import reload_counter\nreload_counter.LOADS.append(1)\n\n" + body
+    write_module(name, src)
+
+
+def test_unchanged_source_skips_reexecution(write_module):
+    write_pipeline(write_module, 'unchanged_pipeline',
+                   "def f(x):\n    return x + 1\n")
+    import reload_counter
+
+    pipeline = ModPipe('unchanged_pipeline')
+    loads = len(reload_counter.LOADS)
+
+    with pipeline:
+        pass
+    pipeline.reload()
+    assert len(reload_counter.LOADS) == loads
+
+    pipeline.reload(force=True)
+    assert len(reload_counter.LOADS) == loads + 1
+
+
+def test_touched_but_unchanged_source_is_reused(module_dir, write_module):
+    write_pipeline(write_module, 'touched_pipeline',
+                   "def f(x):\n    return x + 1\n")
+    import reload_counter
+
+    pipeline = ModPipe('touched_pipeline')
+    loads = len(reload_counter.LOADS)
+
+    path = str(module_dir / 'touched_pipeline.py')
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    pipeline.reload()
+    assert len(reload_counter.LOADS) == loads
+
+
+def test_changed_source_reloads(write_module):
+    write_pipeline(write_module, 'changed_pipeline',
+                   "def f(x):\n    return x + 1\n")
+    pipeline = ModPipe('changed_pipeline')
+    assert pipeline(1) == 2
+
+    write_pipeline(write_module, 'changed_pipeline',
+                   "def f(x):\n    return x + 100\n")
+    with pipeline:
+        assert pipeline(1) == 101
+
+
+def test_same_size_edit_ignores_stale_bytecode(write_module, monkeypatch):
+    monkeypatch.setattr(sys, 'dont_write_bytecode', False)
+    write_pipeline(write_module, 'same_size_pipeline',
+                   "def f(x):\n    return x + 1\n")
+    pipeline = ModPipe('same_size_pipeline')
+    assert pipeline(1) == 2
+
+    # Same size, and (almost certainly) the same second as the .pyc.
+    write_pipeline(write_module, 'same_size_pipeline',
+                   "def f(x):\n    return x - 1\n")
+    pipeline.reload()
+    assert pipeline(1) == 0
+
+
+def test_watch_imports(module_dir, write_module):
+    write_pipeline(write_module, 'importing_pipeline',
+                   "def f(x):\n    return x * reload_counter.SCALE\n")
+
+    pipeline = ModPipe('importing_pipeline', watch_imports=True)
+    unwatched = ModPipe('importing_pipeline')
+    assert pipeline(1) == 2
+
+    (module_dir / 'reload_counter.py').write_text("LOADS = []\nSCALE = 30\n")
+    unwatched.reload()
+    assert unwatched(1) == 2
+
+    pipeline.reload()
+    assert pipeline(1) == 30
@@ -0,0 +1,74 @@
+import threading
+import pytest
+
+from modpipe import ModPipe
+from modpipe.segments import resolve_segments
+from tests.examples import skippy_pipeline
+
+
+NAMES = ('a', 'b', 'c', 'd', 'e')
+
+
+def test_resolve_segments():
+    assert resolve_segments(NAMES) == [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5)]
+    assert resolve_segments(NAMES, 2) == [(0, 2), (2, 5)]
+    assert resolve_segments(NAMES, 9) == resolve_segments(NAMES)
+    assert resolve_segments(NAMES, ['c', 'e']) == [(0, 2), (2, 4), (4, 5)]
+    assert resolve_segments(NAMES, ['a']) == [(0, 5)]
+
+    with pytest.raises(KeyError):
+        resolve_segments(NAMES, ['z'])
+    with pytest.raises(ValueError):
+        resolve_segments(NAMES, 0)
+
+
+@pytest.fixture
+def skippy():
+    skippy_pipeline.THREADS.clear()
+    return ModPipe.on('tests.examples.skippy_pipeline')
+
+
+def expected(x):
+    if x % 3 == 0:
+        return -x
+    if x % 3 == 1:
+        return x + 1
+    return x * 10 + 1
+
+
+@pytest.mark.parametrize('segments', [None, 2, ['middle']])
+def test_smap_threads(skippy, segments):
+    items = range(1000)
+    res = list(skippy.smap(items, segments=segments, chunksize=7,
+                           queue_size=2))
+    assert res == [expected(x) for x in items]
+
+
+def test_smap_runs_segments_on_own_threads(skippy):
+    list(skippy.smap(range(100)))
+    threads = skippy_pipeline.THREADS
+    assert threads['first'].isdisjoint(threads['middle'])
+    assert threading.get_ident() not in threads['first']
+
+
+def test_smap_processes(skippy):
+    items = range(200)
+    res = list(skippy.smap(items, segments=2, chunksize=16, processes=True))
+    assert res == [expected(x) for x in items]
+
+
+def test_smap_propagates_errors(skippy):
+    with pytest.raises(TypeError):
+        list(skippy.smap([2, 'x', 5]))
+
+
+def test_smap_stops_early(skippy):
+    it = skippy.smap(iter(range(10 ** 9)), chunksize=4, queue_size=1)
+    assert next(it) == 0
+    it.close()
+
+
+def test_smap_batch_stages():
+    pipeline = ModPipe.on('tests.examples.batch_pipeline')
+    items = list(range(50))
+    assert list(pipeline.smap(items, chunksize=8)) == pipeline.map(items)
@@ -0,0 +1,137 @@
+import os
+import pytest
+
+from modpipe import ModPipe, DeadLetters
+
+shared_memory = pytest.importorskip('multiprocessing.shared_memory')
+
+from modpipe import shm  # noqa: E402
+
+
+BIG = shm.MIN_SHARED_BYTES
+
+
+@pytest.fixture
+def pipeline():
+    return ModPipe.on('tests.examples.bytes_pipeline')
+
+
+def test_ring_allocates_and_wraps():
+    ring = shm.ShmRing(100)
+    try:
+        assert ring.alloc(40) == 0
+        assert ring.alloc(40) == 40
+        assert ring.alloc(40) is None
+        assert ring.overflows == 1
+
+        ring.release(0)
+        assert ring.alloc(30) == 0
+        assert ring.alloc(20) is None
+
+        ring.release(40)
+        ring.release(0)
+        assert ring.alloc(100) == 0
+    finally:
+        ring.close()
+
+
+def test_ring_fills_exactly_to_the_tail():
+    ring = shm.ShmRing(100)
+    try:
+        assert ring.alloc(50) == 0
+        assert ring.alloc(50) == 50
+        ring.release(0)
+        assert ring.alloc(50) == 0
+        assert ring.alloc(50) is None
+        assert ring.alloc(1) is None
+
+        ring.release(50)
+        assert ring.alloc(50) == 50
+        ring.release(0)
+        ring.release(50)
+        assert ring.alloc(0) is None
+        assert ring.alloc(100) == 0
+    finally:
+        ring.close()
+
+
+def test_put_round_trips():
+    ring = shm.ShmRing(4 * BIG)
+    try:
+        data = bytes(range(256)) * (BIG // 256)
+        ref = ring.put(data)
+        assert isinstance(ref, shm.SharedRef)
+        assert ref.load(ring.shm.buf, copy=True) == data
+
+        view = ring.put(bytearray(data))
+        assert ref.offset != view.offset
+        assert view.load(ring.shm.buf, copy=True) == bytearray(data)
+
+        assert ring.put(b'small') == b'small'
+        assert ring.put('text') == 'text'
+    finally:
+        ring.close()
+
+
+def test_pmap(pipeline):
+    items = [bytes([i]) * (BIG + i) for i in range(8)] + [b'ab']
+    expected = [pipeline(item) for item in items]
+
+    # The ring only fits a couple of items, so the rest are pickled.
+    res = pipeline.pmap(items, workers=2, chunksize=2,
+                        shared_memory=3 * BIG)
+    assert list(res) == expected
+
+    # Memoryviews can't be pickled, so these must all fit.
+    res = pipeline.pmap(map(memoryview, items[:-1]), workers=2,
+                        shared_memory=len(items) * 2 * BIG, ordered=False)
+    assert sorted(res) == sorted(expected[:-1])
+
+
+def test_pmap_batches_chunks():
+    pipeline = ModPipe.on('tests.examples.batch_size_pipeline')
+    items = [b'x' * BIG] * 4 + [b'ab']
+    res = pipeline.pmap(items, workers=2, chunksize=5,
+                        shared_memory=8 * BIG)
+    assert list(res) == [5] * 5
+
+
+def test_pmap_dead_letters(pipeline):
+    letters = DeadLetters()
+    items = [b'x' * BIG, 'text', b'yz']
+    res = pipeline.pmap(items, workers=2, shared_memory=4 * BIG,
+                        dead_letters=letters)
+    assert list(res) == [b'x' * BIG, b'zy']
+    assert [d.stage for d in letters.letters] == ['to_bytes']
+
+
+def test_pmap_arrays(pipeline):
+    numpy = pytest.importorskip('numpy')
+    items = [numpy.arange(BIG, dtype='float64').reshape(-1, 8)
+             for _ in range(4)]
+
+    res = list(pipeline.pmap(items, workers=2, shared_memory=16 * BIG))
+    for item, out in zip(items, res):
+        assert out.shape == item.shape
+        assert (out == item * 2).all()
+
+
+def _segments():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+
+def test_pmap_unlinks_unconsumed_results(pipeline):
+    before = _segments()
+    items = [b'x' * BIG] * 64
+
+    res = pipeline.pmap(items, workers=2, chunksize=4,
+                        shared_memory=64 * BIG)
+    assert next(res) == b'x' * BIG
+    res.close()
+    assert _segments() == before
+
+    res = pipeline.pmap(items[:3] + ['text'], workers=1, chunksize=4,
+                        shared_memory=64 * BIG)
+    with pytest.raises(TypeError):
+        list(res)
+    assert _segments() == before
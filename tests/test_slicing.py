@@ -0,0 +1,103 @@
+import pickle
+import pytest
+
+from modpipe import ModPipe, DeadLetters
+from modpipe.slicing import PipeSlice
+
+
+@pytest.fixture
+def pipeline():
+    return ModPipe.on('tests.examples.sliced_pipeline')
+
+
+def test_slices_by_name(pipeline):
+    view = pipeline['clean':'publish']
+    assert isinstance(view, PipeSlice)
+    assert view._plan.names == ('clean', 'enrich')
+    assert view(5) == 10
+    assert view(-5) == 0
+
+    assert pipeline[:'clean']._plan.names == ('parse',)
+    assert pipeline['enrich':]._plan.names == ('enrich', 'publish')
+    assert pipeline['enrich':]('4') == {'value': '44'}
+
+
+def test_slices_by_index(pipeline):
+    assert pipeline[1:-1]._plan.names == ('clean', 'enrich')
+    assert pipeline[-1:]._plan.names == ('publish',)
+    assert pipeline[:99]._plan.names == pipeline._plan.names
+
+
+def test_prefix_then_suffix_is_the_whole(pipeline):
+    prefix, suffix = pipeline[:'enrich'], pipeline['enrich':]
+    for x in ['3', '7']:
+        assert suffix(prefix(x)) == pipeline(x)
+
+
+def test_skip_within_and_outside(pipeline):
+    assert pipeline['clean':](500) == {'value': 100}
+    with pytest.raises(RuntimeError):
+        pipeline['clean':'publish'](500)
+
+
+def test_bad_slices(pipeline):
+    with pytest.raises(KeyError):
+        pipeline['nope':]
+    with pytest.raises(ValueError):
+        pipeline['enrich':'clean']
+    with pytest.raises(ValueError):
+        pipeline[::2]
+
+
+def test_shares_compiled_stages(pipeline):
+    pipeline.enable_stats()
+    view = pipeline['clean':'publish']
+    assert view._plan.steps == pipeline._plan.steps[1:3]
+    view.map([1, 2, 3])
+    assert pipeline.stats()['enrich']['calls'] == 3
+    assert list(view.stats()) == ['clean', 'enrich']
+
+
+def test_follows_reloads(pipeline):
+    view = pipeline['enrich':]
+    first = view._plan
+    assert view._plan is first
+    pipeline.reload(force=True)
+    assert view._plan is not first
+    assert view(2) == {'value': 4}
+
+
+def test_read_only(pipeline):
+    view = pipeline['enrich':]
+    with pytest.raises(TypeError):
+        del view['enrich']
+
+
+def test_bulk_modes(pipeline):
+    view = pipeline['clean':'publish']
+    items = [1, -1, 3]
+    assert view.map(items) == [2, 0, 6]
+    assert list(view.tmap(items, threads=2)) == [2, 0, 6]
+    assert list(view.smap(items)) == [2, 0, 6]
+    assert list(view.pmap(items, workers=2)) == [2, 0, 6]
+
+    letters = DeadLetters()
+    assert view.map([1, 'x', 2], dead_letters=letters) == [2, 4]
+    assert letters.letters[0].stage == 'clean'
+
+
+def test_manifest_and_pickle(pipeline):
+    view = pipeline['clean':'publish']
+    assert view.manifest()['stages'] == [['clean', 1], ['enrich', 1]]
+    rebuilt = ModPipe.from_manifest(view.manifest())
+    assert rebuilt._plan.names == ('clean', 'enrich')
+
+    clone = pickle.loads(pickle.dumps(view))
+    assert clone(5) == 10
+
+
+def test_slice_of_a_slice(pipeline):
+    view = pipeline['clean':]['enrich':'publish']
+    assert view._plan.names == ('enrich',)
+    assert repr(view) == ("ModPipe(tests.examples.sliced_pipeline)"
+                          "['clean':None]['enrich':'publish']")
@@ -0,0 +1,98 @@
+import pytest
+
+from modpipe import ModPipe
+from modpipe.stats import StageStats
+
+
+@pytest.fixture
+def math_pipeline():
+    pipeline = ModPipe('tests.examples.math_mod')
+    pipeline.enable_stats()
+    return pipeline
+
+
+def test_disabled_by_default():
+    pipeline = ModPipe('tests.examples.math_mod')
+    pipeline(0, 1)
+    assert pipeline.stats() == {}
+    assert pipeline._plan.stage_stats is None
+
+
+def test_counts_calls_and_exits(math_pipeline):
+    math_pipeline(0, 1)
+    math_pipeline(0, 0)
+    math_pipeline(42, 42)
+
+    stats = math_pipeline.stats()
+    assert list(stats) == ['normed', 'rot90', 'times_ten']
+    assert stats['normed']['calls'] == 3
+    assert stats['normed']['done'] == 1
+    assert stats['normed']['skipped'] == 1
+    assert stats['rot90']['calls'] == 1
+    assert stats['times_ten']['calls'] == 2
+
+
+def test_counts_nones_and_errors():
+    pipeline = ModPipe('tests.examples.inconsistent_pipeline')
+    pipeline.enable_stats()
+    pipeline(1)
+
+    with pytest.raises(TypeError):
+        pipeline(None)
+
+    stats = pipeline.stats()
+    assert stats['h']['nones'] == 1
+    assert stats['h']['errors'] == 1
+    assert stats['last_one']['calls'] == 1
+
+
+def test_reset_and_disable(math_pipeline):
+    math_pipeline(0, 1)
+    math_pipeline.reset_stats()
+    assert math_pipeline.stats()['normed']['calls'] == 0
+
+    math_pipeline.disable_stats()
+    math_pipeline(0, 1)
+    assert math_pipeline.stats() == {}
+
+
+def test_survives_reload(math_pipeline):
+    math_pipeline(0, 1)
+    math_pipeline.reload()
+    math_pipeline(0, 1)
+    assert math_pipeline.stats()['normed']['calls'] == 2
+
+
+def test_survives_del(math_pipeline):
+    math_pipeline(0, 1)
+    del math_pipeline['rot90']
+    math_pipeline(0, 1)
+    assert math_pipeline.stats()['normed']['calls'] == 2
+
+
+def test_percentiles():
+    st = StageStats()
+    for i in range(1, 101):
+        st.record(i * 1e-6)
+
+    assert st.percentile(50) == pytest.approx(50e-6, rel=0.15)
+    assert st.percentile(99) == pytest.approx(99e-6, rel=0.15)
+    assert st.summary()['mean_s'] == pytest.approx(50.5e-6)
+
+
+def test_edited_stages_start_fresh(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    src = tmp_path / 'stats_edit_pipeline.py'
+    src.write_text("def f(x):\n    return x + 1\n\n\ndef g(x):\n    return x\n")
+
+    pipeline = ModPipe('stats_edit_pipeline')
+    pipeline.enable_stats()
+    pipeline(1)
+
+    src.write_text("def f(x):\n    return x + 1\n\n\ndef g(x):\n    return -x\n")
+    pipeline.reload()
+    assert pipeline(1) == -2
+
+    stats = pipeline.stats()
+    assert stats['f']['calls'] == 2
+    assert stats['g']['calls'] == 1
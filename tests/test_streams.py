@@ -0,0 +1,95 @@
+import gzip
+import pytest
+
+from modpipe import ModPipe
+from modpipe import streams
+
+
+@pytest.fixture
+def pipeline():
+    return ModPipe.on('tests.examples.ingest_pipeline')
+
+
+@pytest.mark.parametrize('name', ['items.jsonl', 'items.jsonl.gz'])
+def test_jsonl_round_trip(tmp_path, name):
+    path = str(tmp_path / name)
+    records = [{'a': 1}, [1, 2], 'x', None]
+
+    with streams.JsonlWriter(path) as writer:
+        writer.write_many(records[:2])
+        writer.write_many(records[2:])
+
+    assert list(streams.read_jsonl(path)) == records
+
+
+def test_gzip_is_really_gzip(tmp_path):
+    path = str(tmp_path / 'lines.txt.gz')
+    with streams.LineWriter(path) as writer:
+        writer.write_many(['a', 'b'])
+
+    with gzip.open(path, 'rt') as fp:
+        assert fp.read() == 'a\nb\n'
+
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_read_lines(tmp_path, use_mmap):
+    path = tmp_path / 'lines.txt'
+    path.write_text('one\ntwo\r\n\nthree')
+    res = list(streams.read_lines(str(path), use_mmap=use_mmap))
+    assert res == ['one', 'two', '', 'three']
+
+
+def test_mmap_empty_file(tmp_path):
+    path = tmp_path / 'empty.txt'
+    path.write_text('')
+    assert list(streams.read_lines(str(path), use_mmap=True)) == []
+
+
+def test_csv_round_trip(tmp_path):
+    path = str(tmp_path / 'rows.csv')
+    rows = [{'id': '1', 'name': 'a,b'}, {'id': '2', 'name': 'c'}]
+
+    with streams.CsvWriter(path) as writer:
+        writer.write_many(rows)
+
+    assert list(streams.read_csv(path)) == rows
+    assert list(streams.read_csv(path, header=False))[0] == ['id', 'name']
+
+
+def test_prefetch_preserves_order():
+    assert list(streams.prefetch(range(10000), chunk_size=7,
+                                 max_chunks=2)) == list(range(10000))
+
+
+def test_prefetch_propagates_errors():
+    def items():
+        yield 1
+        raise ValueError("bad source")
+
+    with pytest.raises(ValueError):
+        list(streams.prefetch(items()))
+
+
+def test_prefetch_stops_when_closed():
+    it = streams.prefetch(iter(range(10 ** 9)), chunk_size=10, max_chunks=2)
+    assert next(it) == 0
+    it.close()
+
+
+def test_run(tmp_path, pipeline):
+    src, dst = str(tmp_path / 'in.jsonl'), str(tmp_path / 'out.jsonl')
+    with streams.JsonlWriter(src) as writer:
+        writer.write_many(range(10))
+
+    with streams.JsonlWriter(dst) as sink:
+        n = pipeline.run(streams.read_jsonl(src), sink, write_every=3)
+
+    assert n == 10
+    assert list(streams.read_jsonl(dst)) == [[2 * i, -2 * i]
+                                             for i in range(10)]
+
+
+def test_run_into_list(pipeline):
+    out = []
+    assert pipeline.run([1, 2], out, prefetch=False) == 2
+    assert out == [(2, -2), (4, -4)]
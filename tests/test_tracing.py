@@ -0,0 +1,121 @@
+import json
+import pickle
+import pytest
+
+from modpipe import ModPipe, DeadLetters
+
+
+@pytest.fixture
+def pipeline():
+    return ModPipe.on('tests.examples.flaky_pipeline')
+
+
+def test_disabled_by_default(pipeline):
+    assert pipeline._plan.tracer is None
+    assert pipeline.traces() == []
+
+
+def test_predicate_sampling(pipeline):
+    pipeline.enable_tracing(predicate=lambda x: x in ('4', '0'))
+    assert pipeline.map(['1', '4', '50']) == [100, 25, 2]
+
+    traces = pipeline.traces()
+    assert len(traces) == 1
+    assert traces[0]['args'] == ('4',)
+    assert traces[0]['steps'] == [
+        {'stage': 'parse', 'input': ('4',), 'output': 4, 'exit': 'value'},
+        {'stage': 'check', 'input': 4, 'output': 4, 'exit': 'none'},
+        {'stage': 'invert', 'input': 4, 'output': 25, 'exit': 'value'},
+    ]
+
+
+def test_errors_are_traced(pipeline):
+    pipeline.enable_tracing(predicate=lambda x: True)
+    with pytest.raises(ValueError):
+        pipeline('-1')
+
+    step = pipeline.traces()[0]['steps'][-1]
+    assert step['stage'] == 'check' and step['exit'] == 'error'
+    assert isinstance(step['output'], ValueError)
+
+
+def test_dead_letter_runs_are_traced(pipeline):
+    pipeline.enable_tracing(rate=1.0)
+    letters = DeadLetters()
+    assert pipeline.map(['4', '-1'], dead_letters=letters) == [25]
+    assert [(d.item, d.stage) for d in letters.letters] == [('-1', 'check')]
+
+    traces = pipeline.traces()
+    assert [t['args'] for t in traces] == [('4',), ('-1',)]
+    assert traces[0]['steps'][-1]['exit'] == 'value'
+    assert traces[1]['steps'][-1]['stage'] == 'check'
+    assert traces[1]['steps'][-1]['exit'] == 'error'
+
+
+def test_done_and_skip():
+    pipeline = ModPipe.on('tests.examples.exits_pipeline')
+    pipeline.enable_tracing(rate=1.0)
+
+    assert pipeline.map([1, 0]) == [4, 'zero']
+    skipped, done = pipeline.traces()
+    assert [(s['stage'], s['exit']) for s in skipped['steps']] == \
+        [('a', 'skip'), ('c', 'value')]
+    assert [(s['stage'], s['exit'], s['output'])
+            for s in done['steps']] == [('a', 'done', 'zero')]
+
+
+def test_rate_and_ring_buffer(pipeline):
+    tracer = pipeline.enable_tracing(rate=1.0, capacity=3)
+    pipeline.map([str(i) for i in range(1, 11)])
+    args = [t['args'] for t in pipeline.traces()]
+    assert args == [('8',), ('9',), ('10',)]
+
+    pipeline.enable_tracing(rate=0.0)
+    pipeline.map(['1'] * 100)
+    assert pipeline.traces() == []
+    assert len(tracer.traces) == 3
+
+
+def test_disable(pipeline):
+    pipeline.enable_tracing(rate=1.0)
+    pipeline.disable_tracing()
+    pipeline('1')
+    assert pipeline.traces() == []
+    assert pipeline._plan.run.__func__ is type(pipeline._plan).run
+    assert pipeline._plan.run_located.__func__ is \
+        type(pipeline._plan).run_located
+
+
+def test_tracing_keeps_stats(pipeline):
+    pipeline.enable_stats()
+    pipeline.enable_tracing(rate=1.0)
+    pipeline.map(['1', '4'])
+    assert pipeline.stats()['check']['calls'] == 2
+    assert pipeline.stats()['check']['nones'] == 2
+
+    pipeline.disable_stats()
+    pipeline('4')
+    assert len(pipeline.traces()) == 3
+
+
+def test_survives_reload(pipeline):
+    pipeline.enable_tracing(rate=1.0)
+    pipeline.reload(force=True)
+    pipeline('4')
+    assert len(pipeline.traces()) == 1
+
+
+def test_dump_to_file(tmp_path, pipeline):
+    path = str(tmp_path / 'traces.jsonl')
+    tracer = pipeline.enable_tracing(rate=1.0)
+    pipeline('4')
+    tracer.dump(path)
+    with open(path) as fp:
+        assert json.loads(fp.readline())['steps'][-1]['output'] == 25
+
+
+def test_pickle_drops_tracer(pipeline):
+    pipeline.enable_tracing(predicate=lambda x: True)
+    clone = pickle.loads(pickle.dumps(pipeline))
+    assert clone._plan.tracer is None
+    assert clone('4') == 25
@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import pytest
+
+from modpipe import ModPipe
+
+
+def write(path, source):
+    previous = os.stat(str(path)).st_mtime_ns if path.exists() else 0
+    path.write_text(source)
+    # Make sure the edit is seen, by the watcher and by the bytecode cache,
+    # even if it lands in the same second as the last one: both only
+    # compare whole-second mtimes (and size).
+    st = os.stat(str(path))
+    mtime = max(st.st_mtime_ns, previous) + 10 ** 9
+    os.utime(str(path), ns=(st.st_atime_ns, mtime))
+
+
+@pytest.fixture
+def module_path(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'hot_pipeline', raising=False)
+    path = tmp_path / 'hot_pipeline.py'
+    write(path, "def f(x):\n    return x + 1\n")
+    return path
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("Timed out")
+        time.sleep(0.01)
+
+
+def test_validated_reload_swaps_in_fresh_module(module_path):
+    pipeline = ModPipe.on('hot_pipeline')
+    old_module, old_plan = sys.modules['hot_pipeline'], pipeline._plan
+
+    write(module_path, "def f(x):\n    return x + 2\n")
+    pipeline.reload(validate=True)
+
+    assert pipeline(1) == 3
+    assert sys.modules['hot_pipeline'] is not old_module
+    # The old snapshot still runs the old code.
+    assert old_plan.run((1,)) == 2
+
+
+@pytest.mark.parametrize('source', [
+    "def f(x):\n    return x +\n",
+    "def f(x):\n    return x + 3\n\nassert False, 'bad config'\n",
+    "X = 1\n",
+])
+def test_failed_validation_keeps_everything(module_path, source):
+    pipeline = ModPipe.on('hot_pipeline')
+    old_module, old_plan = sys.modules['hot_pipeline'], pipeline._plan
+
+    write(module_path, source)
+    with pytest.raises((SyntaxError, AssertionError)):
+        pipeline.reload(validate=True)
+
+    assert sys.modules['hot_pipeline'] is old_module
+    assert old_module.f(1) == 2
+    assert pipeline._plan is old_plan
+
+
+def test_validation_covers_imported_modules(module_path, monkeypatch):
+    monkeypatch.delitem(sys.modules, 'hot_settings', raising=False)
+    settings_path = module_path.parent / 'hot_settings.py'
+    write(settings_path, "SCALE = 2\n")
+    write(module_path, "import hot_settings\n\n"
+                       "def f(x):\n    return x * hot_settings.SCALE\n")
+    pipeline = ModPipe.on('hot_pipeline', watch_imports=True)
+    old_settings = sys.modules['hot_settings']
+
+    write(settings_path, "SCALE = 3\nassert False, 'bad config'\n")
+    with pytest.raises(AssertionError):
+        pipeline.reload(validate=True)
+    assert sys.modules['hot_settings'] is old_settings
+    assert old_settings.SCALE == 2
+    assert pipeline(1) == 2
+
+    write(settings_path, "SCALE = 30\n")
+    pipeline.reload(validate=True)
+    assert pipeline(1) == 30
+    assert old_settings.SCALE == 2
+
+
+def test_failed_signature_check(module_path):
+    pipeline = ModPipe.on('hot_pipeline', unif_sigs=True)
+    write(module_path, "def f(x):\n    return x\n\ndef g(x, y):\n"
+                       "    return x\n")
+    with pytest.raises(RuntimeError):
+        pipeline.reload(validate=True)
+    assert pipeline(1) == 2
+
+
+def test_watcher_check(module_path):
+    pipeline = ModPipe.on('hot_pipeline')
+    reloaded, errors = [], []
+    watcher = pipeline.watch(interval=60, on_reload=reloaded.append,
+                             on_error=errors.append)
+    try:
+        assert not watcher.check()
+
+        write(module_path, "def f(x):\n    return x +\n")
+        assert not watcher.check()
+        assert watcher.errors == 1 and len(errors) == 1
+        assert not watcher.check()
+        assert watcher.errors == 1  # Not retried until edited again.
+
+        write(module_path, "def f(x):\n    return x * 10\n")
+        assert watcher.check()
+        assert reloaded == [pipeline] and pipeline(2) == 20
+    finally:
+        watcher.stop()
+
+
+def test_watcher_thread(module_path):
+    pipeline = ModPipe.on('hot_pipeline')
+    with pipeline.watch(interval=0.01, use_inotify=False) as watcher:
+        write(module_path, "def f(x):\n    return -x\n")
+        wait_for(lambda: pipeline(5) == -5)
+        assert watcher.reloads == 1
+        assert not watcher.uses_inotify
+
+
+def test_watcher_chain(module_path, tmp_path, monkeypatch):
+    monkeypatch.delitem(sys.modules, 'hot_tail', raising=False)
+    (tmp_path / 'hot_tail.py').write_text("def g(x):\n    return x * 2\n")
+    chain = ModPipe.chain('hot_pipeline', 'hot_tail')
+    with chain.watch(interval=0.01) as watcher:
+        write(module_path, "def f(x):\n    return x + 100\n")
+        wait_for(lambda: chain(1) == 202)
+        assert watcher.reloads == 1